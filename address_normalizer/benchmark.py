@@ -0,0 +1,487 @@
+"""
+Throughput benchmark for the address_normalizer extraction pipeline.
+
+Generates a synthetic corpus of Worcester-style addresses and reports rows/sec
+and per-row latency percentiles for AddressPipeline.run, AddressPipeline.run_batch
+and each extractor in EXTRACTORS on its own. Results can be written to JSON and
+compared against a previous run to catch regressions:
+
+    python -m address_normalizer.benchmark --rows 100000 --output bench.json
+    python -m address_normalizer.benchmark --rows 100000 --baseline bench.json
+
+--worst-case instead times every extractor on adversarial inputs (long runs
+of digits, letters, separators and near-miss keywords) at two lengths, and
+fails if any extractor's time grows much faster than the input:
+
+    python -m address_normalizer.benchmark --worst-case
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from .extraction.context import ExtractionContext
+from .extraction.pipeline import EXTRACTORS, AddressPipeline
+from .extraction.zipcode import WORCESTER_COUNTY_ZIPS
+
+STREET_NAMES = [
+    "Main",
+    "Park",
+    "Shrewsbury",
+    "Pleasant",
+    "Chandler",
+    "Highland",
+    "Lincoln",
+    "Belmont",
+    "Grafton",
+    "Salisbury",
+    "Burncoat",
+    "Plantation",
+    "June",
+    "May",
+    "Elm",
+    "Cambridge",
+    "Providence",
+    "Southbridge",
+    "Millbury",
+    "Gold Star",
+    "Franklin",
+    "Front",
+    "Green",
+    "Water",
+    "Stafford",
+    "Hamilton",
+    "Lake",
+    "Vernon",
+    "Institute",
+    "West Boylston",
+    "Mill",
+    "Harrington",
+    "Kelley",
+    "Grove",
+    "Sever",
+]
+
+STREET_TYPES = [
+    "St",
+    "ST",
+    "Street",
+    "Ave",
+    "AVENUE",
+    "Rd",
+    "Road",
+    "Dr",
+    "Drive",
+    "Blvd",
+    "Ln",
+    "Ct",
+    "Pl",
+    "Ter",
+    "Sq",
+    "Pkwy",
+    "Way",
+    "Cir",
+    "",
+]
+
+UNITS = [
+    "APT 2",
+    "Apt#3",
+    "APT. 1",
+    "APT.3",
+    "UNIT #1",
+    "Unit 4B",
+    "1ST FLOOR",
+    "2nd floor",
+    "FLOOR #1",
+    "SUITE #803 LOFT 3",
+    "Suite 401 #118",
+    "SUITE 404 B",
+    "SUITE 284 NORTH",
+    "STE 200",
+    "SPACE 1B",
+    "UNIT 803-LOFT 1",
+    "RM. 12",
+    "#5",
+]
+
+TOWNS = [
+    "Worcester",
+    "WORCESTER",
+    "worcester",
+    "Shrewsbury",
+    "Holden",
+    "Auburn",
+    "West Boylston",
+    "North Brookfield",
+    "Leicester",
+]
+
+STATES = ["MA", "Ma", "MASSACHUSETTS", "Massachusetts"]
+
+
+def generate_address(rng: random.Random) -> str:
+    """Generate one synthetic, realistically messy Worcester-style address."""
+    number = str(rng.randint(1, 2500))
+    roll = rng.random()
+    if roll < 0.06:
+        number += rng.choice(["-", " - ", "-"]) + str(int(number) + rng.randint(1, 8))
+    elif roll < 0.10:
+        number += rng.choice(["A", "B", " A", "-B", ".C"])
+    elif roll < 0.13:
+        number += rng.choice([" 1/2", "-1/2"])
+    elif roll < 0.15:
+        number += " " + rng.choice(["2A", "3B"])
+
+    parts = [number, rng.choice(STREET_NAMES), rng.choice(STREET_TYPES)]
+    if rng.random() < 0.25:
+        parts.append(rng.choice(UNITS))
+
+    locality = []
+    if rng.random() < 0.5:
+        locality.append(rng.choice(TOWNS))
+    if rng.random() < 0.4:
+        locality.append(rng.choice(STATES))
+    if rng.random() < 0.4:
+        zip_code = rng.choice(WORCESTER_COUNTY_ZIPS[:-1])
+        if rng.random() < 0.2:
+            zip_code += f"-{rng.randint(0, 9999):04d}"
+        locality.append(zip_code)
+
+    address = " ".join(p for p in parts if p)
+    if locality:
+        address += rng.choice([" ", ", ", "  "]) + " ".join(locality)
+
+    # Messy spacing and casing, as found in hand-entered civic data
+    if rng.random() < 0.1:
+        address = address.replace(" ", "  ", 1)
+    if rng.random() < 0.1:
+        address = f"  {address} "
+    if rng.random() < 0.2:
+        address = address.upper()
+
+    return address
+
+
+def generate_corpus(size: int, seed: int = 0) -> list[str]:
+    """Generate `size` synthetic addresses; the same seed gives the same corpus."""
+    rng = random.Random(seed)
+    return [generate_address(rng) for _ in range(size)]
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _summarize(latencies_ns: list[int], total_s: float) -> dict[str, Any]:
+    latencies_us = sorted(ns / 1000 for ns in latencies_ns)
+    rows = len(latencies_us)
+    return {
+        "rows": rows,
+        "total_s": round(total_s, 6),
+        "rows_per_sec": round(rows / total_s, 1) if total_s else None,
+        "latency_us": {
+            "mean": round(sum(latencies_us) / rows, 3),
+            "p50": round(_percentile(latencies_us, 50), 3),
+            "p90": round(_percentile(latencies_us, 90), 3),
+            "p99": round(_percentile(latencies_us, 99), 3),
+            "max": round(latencies_us[-1], 3),
+        },
+    }
+
+
+def bench_pipeline(corpus: list[str]) -> dict[str, Any]:
+    """Time AddressPipeline.run once per address."""
+    pipeline = AddressPipeline()
+    run = pipeline.run
+    clock = time.perf_counter_ns
+    latencies = []
+
+    start = time.perf_counter()
+    for address in corpus:
+        t0 = clock()
+        run(address)
+        latencies.append(clock() - t0)
+    total = time.perf_counter() - start
+
+    return _summarize(latencies, total)
+
+
+def bench_run_batch(corpus: list[str]) -> dict[str, Any]:
+    """Time AddressPipeline.run_batch over the whole corpus (throughput only)."""
+    pipeline = AddressPipeline()
+
+    start = time.perf_counter()
+    pipeline.run_batch(corpus)
+    total = time.perf_counter() - start
+
+    return {
+        "rows": len(corpus),
+        "total_s": round(total, 6),
+        "rows_per_sec": round(len(corpus) / total, 1) if total else None,
+    }
+
+
+def bench_extractors(corpus: list[str]) -> dict[str, dict[str, Any]]:
+    """
+    Time each extractor on its own.
+
+    Every extractor sees exactly the input it gets inside the pipeline, since
+    the contexts are advanced through the extractors in priority order; only
+    the extractor's own run() call is timed.
+    """
+    clock = time.perf_counter_ns
+    latencies: dict[str, list[int]] = {type(e).__name__: [] for e in EXTRACTORS}
+
+    for address in corpus:
+        ctx = ExtractionContext(address_line=address.strip())
+        for extractor in EXTRACTORS:
+            t0 = clock()
+            extractor.run(ctx)
+            latencies[type(extractor).__name__].append(clock() - t0)
+
+    return {
+        name: _summarize(values, sum(values) / 1e9)
+        for name, values in latencies.items()
+    }
+
+
+def adversarial_inputs(length: int) -> dict[str, str]:
+    """
+    Pathological inputs of roughly `length` characters, keyed by name.
+
+    Each one stresses a pattern shape that can backtrack: long digit or letter
+    runs with no valid terminator, repeated separators, near-miss keywords and
+    tokens that look like a unit or street number over and over.
+    """
+    return {
+        "digits": "1" * length,
+        "digits_then_floor": "1" * length + " X FLOOR",
+        "numbers_then_floor": "1 " * (length // 2) + "X FLOOR",
+        "letters": "A" * length,
+        "letters_unterminated": "A" * length + "!",
+        "hash_words": "#" + " A" * (length // 2) + "!",
+        "hash_long_words": "#" + (" " + "A" * 20) * (length // 21) + "!",
+        "hashes": "#" * length,
+        "spaces": "1" + " " * length + "x",
+        "repeated_designator": "APT " * (length // 4),
+        "dotted": "A." * (length // 2),
+        "digits_then_dash": "1" * length + "-",
+        "near_miss_city": "WORCESTE" * (length // 8),
+        "mixed_tokens": "12 1/2-A#. " * (length // 11),
+        "dashes": "1" + " - " * (length // 3),
+        "repeated_unit": "UNIT #" * (length // 6) + "01602",
+    }
+
+
+def bench_worst_case(
+    length: int = 2000, scale: int = 4, max_growth: float = 2.0, repeat: int = 3
+) -> list[dict[str, Any]]:
+    """
+    Time each extractor on adversarial inputs of `length` and `scale * length`.
+
+    Linear-time matching grows by about `scale`; an entry is flagged when the
+    growth exceeds `scale * max_growth` (e.g. 8x for a 4x longer input), which
+    indicates quadratic or worse backtracking. Timings too small to measure
+    reliably are never flagged. Each timing is the best of `repeat` runs.
+    """
+    small = adversarial_inputs(length)
+    large = adversarial_inputs(length * scale)
+    results = []
+
+    for name in small:
+        for extractor in EXTRACTORS:
+            times = []
+            for address in (small[name], large[name]):
+                best = float("inf")
+                for _ in range(repeat):
+                    ctx = ExtractionContext(address_line=address)
+                    t0 = time.perf_counter()
+                    extractor.run(ctx)
+                    best = min(best, time.perf_counter() - t0)
+                times.append(best)
+
+            growth = times[1] / max(times[0], 1e-9)
+            results.append(
+                {
+                    "input": name,
+                    "extractor": type(extractor).__name__,
+                    "small_ms": round(times[0] * 1000, 3),
+                    "large_ms": round(times[1] * 1000, 3),
+                    "growth": round(growth, 1),
+                    "super_linear": growth > scale * max_growth and times[1] > 0.002,
+                }
+            )
+
+    return results
+
+
+def print_worst_case(results: list[dict[str, Any]]) -> bool:
+    """Print the flagged worst-case entries; return False if there were any."""
+    flagged = [r for r in results if r["super_linear"]]
+    slowest = max(results, key=lambda r: r["large_ms"])
+    print(
+        f"Worst-case benchmark: {len(results)} input/extractor pairs, slowest "
+        f"{slowest['extractor']} on {slowest['input']!r} ({slowest['large_ms']:.2f} ms)"
+    )
+    for r in flagged:
+        print(
+            f"  {r['extractor']:<26} {r['input']:<22} {r['small_ms']:>9.2f} ms -> "
+            f"{r['large_ms']:>9.2f} ms (x{r['growth']})  <-- SUPER-LINEAR"
+        )
+    return not flagged
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run_benchmarks(rows: int, seed: int = 0) -> dict[str, Any]:
+    corpus = generate_corpus(rows, seed)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rows": rows,
+            "seed": seed,
+        },
+        "pipeline.run": bench_pipeline(corpus),
+        "pipeline.run_batch": bench_run_batch(corpus),
+        "extractors": bench_extractors(corpus),
+    }
+
+
+def _throughputs(results: dict[str, Any]) -> dict[str, float]:
+    """Flatten results into {benchmark name: rows/sec}."""
+    flat = {
+        "pipeline.run": results["pipeline.run"]["rows_per_sec"],
+        "pipeline.run_batch": results["pipeline.run_batch"]["rows_per_sec"],
+    }
+    for name, summary in results["extractors"].items():
+        flat[name] = summary["rows_per_sec"]
+    return flat
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> bool:
+    """
+    Print the throughput change of every benchmark against `baseline`.
+
+    Returns False if any benchmark got slower by more than `tolerance`
+    (a fraction, e.g. 0.1 for 10%).
+    """
+    ok = True
+    current = _throughputs(results)
+    previous = _throughputs(baseline)
+
+    print(f"\nComparison against {baseline['meta'].get('commit') or 'baseline'}:")
+    for name, rate in current.items():
+        before = previous.get(name)
+        if not before or not rate:
+            continue
+        change = rate / before - 1
+        regressed = change < -tolerance
+        ok = ok and not regressed
+        flag = "  <-- REGRESSION" if regressed else ""
+        print(
+            f"  {name:<26} {before:>12,.0f} -> {rate:>12,.0f} rows/s ({change:+.1%}){flag}"
+        )
+
+    return ok
+
+
+def print_report(results: dict[str, Any]) -> None:
+    meta = results["meta"]
+    print(
+        f"Address normalizer benchmark: {meta['rows']} rows, seed {meta['seed']}, "
+        f"commit {meta['commit']}, Python {meta['python']}"
+    )
+    print(
+        f"{'benchmark':<26} {'rows/s':>12} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'max us':>10}"
+    )
+
+    entries = [("pipeline.run", results["pipeline.run"])]
+    entries += list(results["extractors"].items())
+    for name, summary in entries:
+        lat = summary["latency_us"]
+        print(
+            f"{name:<26} {summary['rows_per_sec']:>12,.0f} {lat['p50']:>9.2f} "
+            f"{lat['p90']:>9.2f} {lat['p99']:>9.2f} {lat['max']:>10.2f}"
+        )
+
+    batch = results["pipeline.run_batch"]
+    print(f"{'pipeline.run_batch':<26} {batch['rows_per_sec']:>12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the address normalizer extraction pipeline."
+    )
+    parser.add_argument(
+        "--rows", "-n", type=int, default=100_000, help="Corpus size (default: 100000)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Corpus random seed (default: 0)"
+    )
+    parser.add_argument("--output", "-o", help="Write results to this JSON file")
+    parser.add_argument(
+        "--baseline", "-b", help="Compare against results from a previous JSON file"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Allowed throughput drop vs the baseline before failing (default: 0.10)",
+    )
+    parser.add_argument(
+        "--worst-case",
+        action="store_true",
+        help="Time extractors on adversarial inputs and fail on super-linear growth",
+    )
+    args = parser.parse_args()
+
+    if args.worst_case:
+        if not print_worst_case(bench_worst_case()):
+            sys.exit(1)
+        return
+
+    results = run_benchmarks(args.rows, args.seed)
+    print_report(results)
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nResults saved to {output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import argparse
 import sys
 
-from .processor import CSVProcessor
+from .extraction.budget import budget_ms
+from .processor import DEFAULT_BATCH_SIZE, CSVProcessor
 
 
 def main():
@@ -18,6 +19,51 @@ def main():
         default="Address",
         help="Name of the column containing the address (default: 'Address')",
     )
+    parser.add_argument(
+        "--batch-size",
+        "-b",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Rows read, normalized and written per batch (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=1,
+        help="Worker processes used for normalization (default: 1)",
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=None,
+        help="Enable an LRU cache of parsed addresses with this many entries, "
+        "so addresses repeated across batches are only normalized once",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Log per-extractor timing and match counts and the slowest addresses",
+    )
+
+    parser.add_argument(
+        "--time-budget",
+        type=budget_ms,
+        default=None,
+        help="Skip (and log) any address that takes longer than this many "
+        "milliseconds to parse",
+    )
+
+    parser.add_argument(
+        "--manifest",
+        "-m",
+        default=None,
+        help="Sidecar SQLite database of parsed results: addresses unchanged since "
+        "the runs that wrote it are reused instead of normalized again, new ones "
+        "are added, and ones no longer in the input are pruned",
+    )
 
     args = parser.parse_args()
 
@@ -26,7 +72,17 @@ def main():
 
     try:
         processor = CSVProcessor(
-            args.input, args.output, address_column=args.address_column
+            args.input,
+            args.output,
+            address_column=args.address_column,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            cache_size=args.cache_size,
+            profile=args.profile,
+            time_budget=(
+                args.time_budget / 1000 if args.time_budget is not None else None
+            ),
+            manifest_path=args.manifest,
         )
         processor.process()
     except Exception as e:
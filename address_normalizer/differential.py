@@ -0,0 +1,260 @@
+"""
+Differential check of rewritten extractors against the implementations they
+replaced (frozen in address_normalizer.reference).
+
+Each check feeds the same inputs to both versions and compares the output of
+every listed method: the formats the extractor documents (in context and in
+lower case), a seeded fuzz corpus of address tokens and loose characters,
+and the lines the extractor sees inside the pipeline for the benchmark's
+synthetic corpus. It then times each method of both versions on
+the synthetic lines, and exits non-zero if any output differed:
+
+    python -m address_normalizer.differential
+    python -m address_normalizer.differential street_number --fuzz 500000
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+from .benchmark import generate_corpus
+from .extraction.context import ExtractionContext
+from .extraction.pipeline import EXTRACTORS
+from .extraction.street_number import StreetNumberExtractor
+from .extraction.unit import UnitExtractor
+from .reference import street_number as reference_street_number
+from .reference import unit as reference_unit
+
+# Mismatches printed per check
+MAX_REPORTED = 10
+
+
+class Check(NamedTuple):
+    """A rewritten extractor, its frozen predecessor and the inputs to try."""
+
+    reference: Any
+    current: Any
+    # Methods compared and timed, each given an address line; "run" is
+    # compared on the address line and data it leaves in a fresh context
+    methods: tuple[str, ...]
+    documented: tuple[str, ...]
+    # Put before each documented format, e.g. the street a unit follows
+    prefixes: tuple[str, ...]
+    # Fuzz material: whole tokens, and characters to build garbage from
+    tokens: tuple[str, ...]
+    alphabet: str
+
+
+CHECKS: dict[str, Check] = {
+    "unit": Check(
+        reference=reference_unit.UnitExtractor(),
+        current=UnitExtractor(),
+        methods=("_normalize", "run"),
+        documented=(
+            "UNIT #1",
+            "APT#1",
+            "FLOOR #1",
+            "SUITE 401 #118",
+            "APT.3",
+            "APT. 1",
+            "APT. A",
+            "SPACE 1B",
+            "UNIT 803-LOFT 1",
+            "1ST FLOOR",
+            "2ND FLOOR",
+            "SUITE 404 B",
+            "SUITE 284 NORTH",
+            "SUITE #803 LOFT 3",
+        ),
+        prefixes=("", "12 Main St "),
+        tokens=(
+            *("1", "12", "3", "1ST", "2ND", "3RD", "4TH", "ST", "ND", "RD", "TH"),
+            *("FLOOR", "FL", "#", "#1", "##", "APT", "APT.", "APT#", "APT#1"),
+            *("UNIT", "SUITE", "STE", "SUITE#803", "LOFT", "A", "B", "1B"),
+            *("803-LOFT", "SPACE", "RM", "ROOM", "DEPT", "BLDG", "APARTMENT"),
+            *(".", "..", ". ", "#.", "a.b", "x#", "1ST#", "12AB#", "ABC.DEF#"),
+            *("MAIN", "NORTH", "st", "apt.", "Apt#3", "1st floor", "2nd Floor"),
+            # Case mapping and whitespace that \s, \b and str.split may
+            # treat differently
+            *("ſt", "ı", "K", "ß", "١٢", "٣rd", "\t", "\n", "\xa0", "  ", "-"),
+        ),
+        alphabet="1ST#.A FLORN-\t",
+    ),
+    "street_number": Check(
+        reference=reference_street_number.StreetNumberExtractor(),
+        current=StreetNumberExtractor(),
+        methods=("run",),
+        documented=(
+            "12 Main St",
+            "12A Main St",
+            "123A Main",
+            "12 A Main St",
+            "12-A Main St",
+            "12.A Main St",
+            "12 2A Main St",
+            "12-15 Main St",
+            "12 - 15 Main St",
+            "12- 15 Main St",
+            "12 -15 Main St",
+            "12-15",
+            "12 1/2 Main St",
+            "121/2 Main St",
+            "12-1/2 Main St",
+            "Main St",
+        ),
+        prefixes=("", "  "),
+        tokens=(
+            *("1", "12", "15", "121", "-", " - ", "- ", " -", ".", "/", "1/2"),
+            *("2A", "12AB", "A", "a", "B", "AB", "MAIN", "ST", "#", ",", "½"),
+            # Digits, letters and whitespace that \d, [A-Z] with IGNORECASE,
+            # \s and str.strip may treat differently
+            *("١٢", "٣", "ſ", "K", "ı", "ß", "\t", "\n", "\xa0", "\u2009"),
+        ),
+        alphabet="12/-. AaB\t",
+    ),
+}
+
+
+def documented_inputs(check: Check) -> list[str]:
+    """Each documented format after each prefix, as written and in lower case."""
+    inputs = []
+    for example in check.documented:
+        for prefix in check.prefixes:
+            line = prefix + example
+            inputs += [line, line.lower()]
+    return inputs
+
+
+def fuzz_inputs(check: Check, size: int, seed: int = 0) -> list[str]:
+    """
+    `size` random lines: half joined from whole tokens with assorted
+    separators, half from single characters of the alphabet.
+    """
+    rng = random.Random(seed)
+    separators = ["", " ", "  ", ", "]
+    inputs = []
+    for _ in range(size // 2):
+        tokens = rng.choices(check.tokens, k=rng.randint(0, 8))
+        inputs.append(rng.choice(separators).join(tokens))
+    for _ in range(size - size // 2):
+        inputs.append("".join(rng.choices(check.alphabet, k=rng.randint(0, 20))))
+    return inputs
+
+
+def pipeline_inputs(check: Check, corpus: list[str]) -> list[str]:
+    """The address line the extractor is given inside the pipeline, per address."""
+    lines = []
+    for address in corpus:
+        ctx = ExtractionContext(address_line=address.strip())
+        for extractor in EXTRACTORS:
+            if type(extractor) is type(check.current):
+                break
+            extractor.run(ctx)
+        lines.append(ctx.address_line)
+    return lines
+
+
+def _bound(extractor: Any, method: str) -> Callable[[str], Any]:
+    """`method` of `extractor` as a function of the address line."""
+    if method != "run":
+        return getattr(extractor, method)
+
+    def run(line: str) -> tuple[str, dict[str, Any]]:
+        ctx = ExtractionContext(address_line=line)
+        extractor.run(ctx)
+        return (ctx.address_line, ctx.data)
+
+    return run
+
+
+def compare(check: Check, inputs: list[str]) -> list[tuple[str, str, Any, Any]]:
+    """Return (method, input, reference output, current output) for every difference."""
+    mismatches = []
+    for method in check.methods:
+        before = _bound(check.reference, method)
+        after = _bound(check.current, method)
+        for line in inputs:
+            expected, actual = before(line), after(line)
+            if expected != actual:
+                mismatches.append((method, line, expected, actual))
+    return mismatches
+
+
+def time_method(method: Callable[[str], Any], inputs: list[str], repeat: int) -> float:
+    """Best mean time per call over `repeat` passes, in microseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in inputs:
+            method(line)
+        best = min(best, time.perf_counter() - start)
+    return best / len(inputs) * 1e6
+
+
+def run_check(name: str, fuzz: int, rows: int, seed: int, repeat: int) -> bool:
+    """Compare and time one check, print the results; return False on a mismatch."""
+    check = CHECKS[name]
+    synthetic = pipeline_inputs(check, generate_corpus(rows, seed))
+    inputs = documented_inputs(check) + fuzz_inputs(check, fuzz, seed) + synthetic
+
+    mismatches = compare(check, inputs)
+    print(
+        f"{name}: {len(inputs):,} inputs x {len(check.methods)} methods, "
+        f"{len(mismatches)} mismatches"
+    )
+    for method, line, expected, actual in mismatches[:MAX_REPORTED]:
+        print(f"  {method}({line!r}): reference {expected!r}, current {actual!r}")
+
+    for method in check.methods:
+        before = time_method(_bound(check.reference, method), synthetic, repeat)
+        after = time_method(_bound(check.current, method), synthetic, repeat)
+        print(
+            f"  {method:<20} {before:>8.2f} -> {after:>8.2f} us/call "
+            f"({before / after:.2f}x)"
+        )
+
+    return not mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check rewritten extractors against their frozen predecessors."
+    )
+    parser.add_argument(
+        "checks",
+        nargs="*",
+        help=f"Checks to run (default: all of {', '.join(CHECKS)})",
+    )
+    parser.add_argument(
+        "--fuzz", type=int, default=200_000, help="Fuzz corpus size (default: 200000)"
+    )
+    parser.add_argument(
+        "--rows",
+        "-n",
+        type=int,
+        default=50_000,
+        help="Synthetic corpus size, also used for timing (default: 50000)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Corpus random seed (default: 0)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Timing passes per method (default: 3)"
+    )
+    args = parser.parse_args()
+    unknown = set(args.checks) - CHECKS.keys()
+    if unknown:
+        parser.error(f"unknown checks: {', '.join(sorted(unknown))}")
+
+    ok = True
+    for name in args.checks or CHECKS:
+        ok = run_check(name, args.fuzz, args.rows, args.seed, args.repeat) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,58 @@
 from typing import Protocol, runtime_checkable
 
-from .context import ExtractionContext
+from .context import BatchContext, ExtractionContext
 
 
 @runtime_checkable
 class Extractor(Protocol):
+    """
+    Splits one kind of component off the address line.
+
+    An extractor implements parse(), which returns the values of its
+    `fields` followed by the rest of the address line ("" once nothing is
+    left), or None when the component is not there. run() and run_batch()
+    are derived from it: they write the values that were found into the
+    context and replace the address line with the rest. Extractors inherit
+    them, and override run_batch() only for work that is really done per
+    batch.
+    """
+
     priority: int
+    # Data keys of the values parse() returns, in order
+    fields: tuple[str, ...]
+
+    def parse(self, address_line: str) -> tuple[str, ...] | None:
+        """(*values of `fields`, remaining text), or None if nothing was found."""
+        ...
 
     def run(self, ctx: ExtractionContext) -> None:
         """Mutates ctx in place. Never raises for missing data."""
-        ...
+        if not ctx.address_line:
+            return
+
+        parsed = self.parse(ctx.address_line)
+        if not parsed:
+            return
+
+        # zip() stops at the last field, before the remaining text
+        data = ctx.data
+        for field, value in zip(self.fields, parsed, strict=False):
+            if value:
+                data[field] = value
+        ctx.address_line = parsed[-1]
+
+    def run_batch(self, batch: BatchContext) -> None:
+        """Same as run, applied to every address of a columnar batch in place."""
+        lines = batch.address_lines
+        columns = [batch.data[field] for field in self.fields]
+        parse = self.parse
+
+        for i, line in enumerate(lines):
+            if not line:
+                continue
+
+            parsed = parse(line)
+            if parsed:
+                for column, value in zip(columns, parsed, strict=False):
+                    column[i] = value
+                lines[i] = parsed[-1]
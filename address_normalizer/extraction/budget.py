@@ -0,0 +1,65 @@
+import argparse
+import math
+import signal
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class ExtractionTimeout(TimeoutError):
+    """Raised when parsing one address exceeds the pipeline's time budget."""
+
+    def __init__(self, address: str, budget: float):
+        super().__init__(
+            f"Parsing exceeded the {budget * 1000:g} ms budget: {address[:80]!r}"
+        )
+        self.address = address
+        self.budget = budget
+
+
+def budget_ms(value: str) -> float:
+    """argparse type for --time-budget: a positive, finite number of milliseconds."""
+    try:
+        milliseconds = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {value!r}") from None
+    if not (math.isfinite(milliseconds) and milliseconds > 0):
+        raise argparse.ArgumentTypeError(
+            f"must be a positive number of milliseconds, got {value!r}"
+        )
+    return milliseconds
+
+
+def alarm_available() -> bool:
+    """SIGALRM timers only exist on POSIX and can only be set from the main thread."""
+    return (
+        hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+
+
+@contextmanager
+def alarm(seconds: float, address: str) -> Iterator[None]:
+    """
+    Raise ExtractionTimeout if the block runs for longer than `seconds`.
+
+    Uses an ITIMER_REAL timer, which also interrupts a regex that is stuck
+    backtracking. Any handler and timer already installed are restored on exit.
+    Only call this when alarm_available() is true.
+    """
+
+    def on_alarm(signum, frame):
+        raise ExtractionTimeout(address, seconds)
+
+    previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+    previous_timer, _ = signal.setitimer(signal.ITIMER_REAL, seconds)
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+        if previous_timer:
+            remaining = previous_timer - (time.monotonic() - start)
+            signal.setitimer(signal.ITIMER_REAL, max(remaining, 1e-6))
@@ -1,105 +1,252 @@
+import csv
 import re
+import string
+from pathlib import Path
 
-from .context import ExtractionContext
-
-worcester_county_towns = [
-    "Athol",
-    "Auburn",
-    "Barre",
-    "Berlin",
-    "Blackstone",
-    "Bolton",
-    "Boylston",
-    "Brookfield",
-    "Charlton",
-    "Clinton",
-    "Douglas",
-    "Dudley",
-    "East Brookfield",
-    "Fitchburg",
-    "Gardner",
-    "Grafton",
-    "Hardwick",
-    "Holden",
-    "Hopedale",
-    "Hubbardston",
-    "Leicester",
-    "Leominster",
-    "Lunenburg",
-    "Mendon",
-    "Milford",
-    "Millbury",
-    "Millville",
-    "New Braintree",
-    "North Brookfield",
-    "Northborough",
-    "Northbridge",
-    "Oakham",
-    "Oxford",
-    "Paxton",
-    "Petersham",
-    "Phillipston",
-    "Princeton",
-    "Royalston",
-    "Rutland",
-    "Shrewsbury",
-    "Southbridge",
-    "Spencer",
-    "Sterling",
-    "Sturbridge",
-    "Sutton",
-    "Templeton",
-    "Upton",
-    "Uxbridge",
-    "Warren",
-    "Webster",
-    "West Boylston",
-    "West Brookfield",
-    "Westminster",
-    "Winchendon",
-    "Worcester",
-]
-
-
-class CityExtractor:
+from .base import Extractor
+from .street_number import StreetNumberExtractor
+
+# Massachusetts municipalities, villages and aliases: name,city,kind
+GAZETTEER_PATH = Path(__file__).parent / "data" / "ma_places.csv"
+
+# Abbreviated forms accepted for a leading word of a place name, e.g.
+# "No. Brookfield" and "N Brookfield" for North Brookfield
+LEADING_ABBREVIATIONS = {
+    "NORTH": ("NO", "N"),
+    "SOUTH": ("SO", "S"),
+    "EAST": ("E",),
+    "WEST": ("W",),
+    "MOUNT": ("MT",),
+}
+
+# Municipalities and villages of Worcester County, where the input datasets
+# come from. Before the gazetteer covered the whole state only (most of) these
+# towns were matched, and a house number followed by one of them still reads
+# as a town ("809 Grafton"); see CityExtractor.parse.
+WORCESTER_COUNTY_PLACES = frozenset(
+    [
+        "Ashburnham",
+        "Athol",
+        "Auburn",
+        "Barre",
+        "Berlin",
+        "Blackstone",
+        "Bolton",
+        "Boylston",
+        "Brookfield",
+        "Charlton",
+        "Clinton",
+        "Douglas",
+        "Dudley",
+        "East Brookfield",
+        "Fitchburg",
+        "Gardner",
+        "Grafton",
+        "Hardwick",
+        "Harvard",
+        "Holden",
+        "Hopedale",
+        "Hubbardston",
+        "Lancaster",
+        "Leicester",
+        "Leominster",
+        "Lunenburg",
+        "Mendon",
+        "Milford",
+        "Millbury",
+        "Millville",
+        "New Braintree",
+        "North Brookfield",
+        "Northborough",
+        "Northbridge",
+        "Oakham",
+        "Oxford",
+        "Paxton",
+        "Petersham",
+        "Phillipston",
+        "Princeton",
+        "Royalston",
+        "Rutland",
+        "Shrewsbury",
+        "Southborough",
+        "Southbridge",
+        "Spencer",
+        "Sterling",
+        "Sturbridge",
+        "Sutton",
+        "Templeton",
+        "Upton",
+        "Uxbridge",
+        "Warren",
+        "Webster",
+        "West Boylston",
+        "West Brookfield",
+        "Westborough",
+        "Westminster",
+        "Winchendon",
+        "Worcester",
+        # Villages
+        "Baldwinville",
+        "Charlton City",
+        "Charlton Depot",
+        "Cherry Valley",
+        "East Douglas",
+        "East Princeton",
+        "East Templeton",
+        "Farnumsville",
+        "Fiskdale",
+        "Gilbertville",
+        "Jefferson",
+        "Linwood",
+        "Manchaug",
+        "North Grafton",
+        "North Oxford",
+        "North Uxbridge",
+        "Otter River",
+        "Rochdale",
+        "South Barre",
+        "South Grafton",
+        "South Lancaster",
+        "Still River",
+        "Wheelwright",
+        "Whitinsville",
+        "Wilkinsonville",
+        "Winchendon Springs",
+    ]
+)
+
+# Place names are matched token by token; anything else separates tokens
+WORD_CHARS = frozenset(string.ascii_letters + string.digits)
+
+
+def load_gazetteer(path: Path = GAZETTEER_PATH) -> dict[str, str]:
+    """Read a gazetteer CSV into {place name: city to report}."""
+    with open(path, encoding="utf-8", newline="") as f:
+        return {row["name"]: row["city"] for row in csv.DictReader(f)}
+
+
+def _tokens(name: str) -> list[str]:
+    return re.findall(r"[A-Z0-9]+", name.upper())
+
+
+class _TrieNode:
+    __slots__ = ("children", "city")
+
+    def __init__(self):
+        self.children: dict[str, _TrieNode] = {}
+        self.city: str | None = None
+
+
+class CityExtractor(Extractor):
     """
-    Extracts city using a whitelist of Worcester County towns.
-    Matches only known town names at the end of the address.
+    Extracts city using a gazetteer of Massachusetts municipalities,
+    villages and aliases (see GAZETTEER_PATH).
+    Matches only known place names at the end of the address.
     Priority: 12
+
+    Names are stored in a trie keyed on their tokens in reverse order, so a
+    lookup walks back from the end of the address one token at a time and
+    stops at the first token that cannot continue a name. The cost depends
+    only on the length of the matched tail, not on the size of the gazetteer.
+    The longest matching name wins (NORTH BROOKFIELD over BROOKFIELD), and
+    the reported city is the gazetteer's canonical spelling.
+
+    A place outside WORCESTER_COUNTY_PLACES with only a street number before
+    it is taken as the street name instead ("12 Franklin", "5-7 Lincoln"),
+    since far more of these addresses are Worcester streets named after a
+    town than addresses that leave out the street.
     """
 
     priority = 12
+    fields = ("city",)
 
-    def __init__(self):
-        # Normalize towns to uppercase
-        self.towns = sorted(
-            [t.upper() for t in worcester_county_towns],
-            key=lambda x: len(x),
-            reverse=True,  # longest first (e.g., "NORTH BROOKFIELD")
-        )
+    def __init__(self, gazetteer: dict[str, str] | None = None):
+        if gazetteer is None:
+            gazetteer = load_gazetteer()
 
-        # Build regex: (TOWN1|TOWN2|TOWN3)$
-        escaped = [re.escape(t) for t in self.towns]
-        pattern = r"(?P<city>" + "|".join(escaped) + r")$"
+        # The street number grammar itself, so that whatever StreetNumberExtractor
+        # would take as the whole street number counts as "only a number"
+        self.street_number_pattern = StreetNumberExtractor().pattern
 
-        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.trie = _TrieNode()
 
-    def run(self, ctx: ExtractionContext) -> None:
-        if not ctx.address_line:
-            return
+        # Listed names first, so that they take precedence over the
+        # abbreviated variants generated below
+        for name, city in gazetteer.items():
+            self._insert(_tokens(name), city, name)
 
-        text = ctx.address_line.strip()
+        for name, city in gazetteer.items():
+            tokens = _tokens(name)
+            for abbreviation in LEADING_ABBREVIATIONS.get(tokens[0], ()):
+                self._insert([abbreviation, *tokens[1:]], city)
 
-        match = self.pattern.search(text)
-        if not match:
-            return
+    def _insert(self, tokens: list[str], city: str, name: str | None = None) -> None:
+        """
+        Add a name to the trie. `name` marks a gazetteer entry, which may not
+        conflict with another; generated variants never replace an entry.
+        """
+        node = self.trie
+        for token in reversed(tokens):
+            node = node.children.setdefault(token, _TrieNode())
+
+        if node.city is None:
+            node.city = city
+        elif name is not None and node.city != city:
+            raise ValueError(
+                f"Gazetteer name {name!r} maps to both {node.city!r} and {city!r}"
+            )
+
+    def match(self, text: str) -> tuple[str, int] | None:
+        """
+        Find the longest known place name that ends `text`.
+
+        Returns:
+          (city, start index of the name in text), or None
+        """
+        node = self.trie
+        best = None
+        end = len(text)
 
-        city = match.group("city")
+        while end:
+            start = end
+            while start and text[start - 1] in WORD_CHARS:
+                start -= 1
+            if start == end:
+                break  # text ends with punctuation
+
+            child = node.children.get(text[start:end].upper())
+            if child is None:
+                break
+            node = child
+            if node.city is not None:
+                best = (node.city, start)
+
+            end = start
+            while end and text[end - 1] not in WORD_CHARS:
+                end -= 1
+
+        return best
+
+    def parse(self, address_line: str) -> tuple[str, str] | None:
+        """
+        Split a trailing known place name off `address_line`.
+
+        Returns:
+          (city, remaining_text), or None if no known place was found
+        """
+        text = address_line.strip()
+
+        match = self.match(text)
+        if not match:
+            return None
 
-        # Store normalized city name
-        ctx.data["city"] = city.title()
+        city, start = match
+        remaining = text[:start].strip()
+        if (
+            remaining
+            and city not in WORCESTER_COUNTY_PLACES
+            and self.street_number_pattern.fullmatch(remaining)
+        ):
+            return None
 
-        # Remove city from address
-        ctx.address_line = re.sub(
-            re.escape(city) + r"$", "", text, flags=re.IGNORECASE
-        ).strip()
+        return (city, remaining)
@@ -2,8 +2,20 @@ from dataclasses import dataclass, field
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class ExtractionContext:
     address_line: str
     data: dict[str, Any] = field(default_factory=dict)
-    anchors: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class BatchContext:
+    """
+    Columnar counterpart of ExtractionContext for AddressPipeline.run_batch.
+
+    `address_lines[i]` is the unprocessed remainder of address i, and each
+    column in `data` holds one value per address ("" where nothing was found).
+    """
+
+    address_lines: list[str]
+    data: dict[str, list[str]]
@@ -1,14 +1,48 @@
-from typing import Any
+import time
+from collections.abc import Iterable
+from typing import Any, NamedTuple
 
 from .base import Extractor
+from .budget import ExtractionTimeout, alarm, alarm_available
+from .cache import CacheInfo, LRUCache
 from .city import CityExtractor
-from .context import ExtractionContext
+from .context import BatchContext, ExtractionContext
 from .state import StateExtractor
+from .stats import PipelineStats
 from .street_name import StreetNameTypeExtractor
 from .street_number import StreetNumberExtractor
 from .unit import UnitExtractor
 from .zipcode import ZipCodeExtractor
 
+
+class ParsedAddress(NamedTuple):
+    """Parsed address components in output column order, "" where not found."""
+
+    street_number: str = ""
+    street_range_to: str = ""
+    street_extension: str = ""
+    street_name: str = ""
+    street_type: str = ""
+    unit: str = ""
+    city: str = ""
+    state: str = ""
+    zip_code: str = ""
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, list[str]]) -> list["ParsedAddress"]:
+        """Turn AddressPipeline.run_batch output into one ParsedAddress per address."""
+        return list(map(cls._make, zip(*(columns[f] for f in FIELDS), strict=True)))
+
+    def as_dict(self) -> dict[str, str]:
+        """The components that were found, keyed by field, as returned by run()."""
+        return {
+            field: value for field, value in zip(FIELDS, self, strict=True) if value
+        }
+
+
+# Parsed address components, in output column order
+FIELDS = ParsedAddress._fields
+
 EXTRACTORS: list[Extractor] = sorted(
     [
         UnitExtractor(),
@@ -23,14 +57,157 @@ EXTRACTORS: list[Extractor] = sorted(
 
 
 class AddressPipeline:
-    def __init__(self):
+    """
+    Runs the EXTRACTORS over a raw address and returns the parsed components.
+
+    `cache_size` enables an optional LRU cache of parsed results keyed on the
+    stripped raw address. Entries are stored as immutable ParsedAddress
+    tuples and every call returns a fresh dict, so callers may mutate the
+    result freely.
+
+    `instrument` records per-extractor time, call and match counts plus the
+    slowest addresses in `stats` (see PipelineStats). When it is off the only
+    cost is one attribute check per address.
+
+    `time_budget` (seconds) bounds the time spent on a single address. `run`
+    raises ExtractionTimeout for an address that exceeds it; `run_batch`
+    leaves that address's components empty and records it in `timed_out`.
+    In the main thread on POSIX the budget is enforced with a SIGALRM timer,
+    which interrupts even a stuck regex; elsewhere it is checked between
+    extractors.
+    """
+
+    def __init__(
+        self,
+        cache_size: int | None = None,
+        instrument: bool = False,
+        time_budget: float | None = None,
+    ):
         self.extractors = EXTRACTORS
+        self.time_budget = time_budget
+        self.timed_out: list[str] = []
+        self.cache = LRUCache(cache_size) if cache_size else None
+        self.stats = (
+            PipelineStats([type(e).__name__ for e in self.extractors])
+            if instrument
+            else None
+        )
 
     def run(self, raw_address: str) -> dict[str, Any]:
         raw_address = raw_address.strip()
+
+        if self.cache is None:
+            return self._extract(raw_address)
+
+        cached = self.cache.get(raw_address)
+        if cached is not None:
+            return cached.as_dict()
+
+        data = self._extract(raw_address)
+        self.cache.put(raw_address, ParsedAddress(**data))
+        return data
+
+    def run_batch(self, addresses: Iterable[str | None]) -> dict[str, list[str]]:
+        """
+        Parse many addresses at once and return columnar output.
+
+        `addresses` may be any iterable of strings, such as a list or a pandas
+        Series; missing values (None, NaN) are treated as empty addresses.
+        Returns one list per field in FIELDS, aligned with the input, with ""
+        for components that were not found. Each extractor is applied across
+        the whole batch in turn, and repeated addresses are parsed only once.
+        The result cache is not consulted. With instrumentation or a time
+        budget, addresses are parsed one at a time so that each can be timed.
+
+        Example:
+          pd.DataFrame(pipeline.run_batch(df["Address"]), index=df.index)
+
+        ParsedAddress.from_columns() turns the result into one tuple per address.
+        """
+        lines = [a.strip() if isinstance(a, str) else "" for a in addresses]
+        positions = {line: i for i, line in enumerate(dict.fromkeys(lines))}
+
+        batch = BatchContext(
+            address_lines=list(positions),
+            data={field: [""] * len(positions) for field in FIELDS},
+        )
+        if self.stats is None and self.time_budget is None:
+            for extractor in self.extractors:
+                extractor.run_batch(batch)
+        else:
+            for i, line in enumerate(batch.address_lines):
+                try:
+                    data = self._extract(line)
+                except ExtractionTimeout:
+                    self.timed_out.append(line)
+                    continue
+                for field, value in data.items():
+                    batch.data[field][i] = value
+
+        if len(positions) == len(lines):
+            return batch.data
+
+        # Broadcast the results of each distinct address back to its rows
+        rows = [positions[line] for line in lines]
+        return {
+            field: [column[i] for i in rows] for field, column in batch.data.items()
+        }
+
+    def cache_info(self) -> CacheInfo | None:
+        """Hits, misses, evictions and size of the result cache, if enabled."""
+        return self.cache.info() if self.cache is not None else None
+
+    def pop_timed_out(self) -> list[str]:
+        """Return the addresses run_batch skipped for exceeding the budget, and reset."""
+        timed_out, self.timed_out = self.timed_out, []
+        return timed_out
+
+    def _extract(self, raw_address: str) -> dict[str, Any]:
+        budget = self.time_budget
+        if budget is None:
+            return self._run_extractors(raw_address)
+
+        if alarm_available():
+            with alarm(budget, raw_address):
+                return self._run_extractors(raw_address)
+
+        deadline = time.perf_counter() + budget
+        data = self._run_extractors(raw_address, deadline)
+        if time.perf_counter() > deadline:
+            raise ExtractionTimeout(raw_address, budget)
+        return data
+
+    def _run_extractors(
+        self, raw_address: str, deadline: float | None = None
+    ) -> dict[str, Any]:
+        if self.stats is not None:
+            return self._extract_instrumented(raw_address, self.stats, deadline)
+
+        ctx = ExtractionContext(address_line=raw_address)
+
+        for extractor in self.extractors:
+            extractor.run(ctx)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+        return ctx.data
+
+    def _extract_instrumented(
+        self, raw_address: str, stats: PipelineStats, deadline: float | None = None
+    ) -> dict[str, Any]:
         ctx = ExtractionContext(address_line=raw_address)
+        clock = time.perf_counter_ns
+        timings = []
 
+        start = clock()
         for extractor in self.extractors:
+            found = len(ctx.data)
+            t0 = clock()
             extractor.run(ctx)
+            elapsed = clock() - t0
+            timings.append((type(extractor).__name__, elapsed, len(ctx.data) > found))
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        stats.record(raw_address, timings, clock() - start)
 
         return ctx.data
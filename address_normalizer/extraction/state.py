@@ -1,28 +1,34 @@
 import re
 
-from .context import ExtractionContext
+from .base import Extractor
 
 
-class StateExtractor:
+class StateExtractor(Extractor):
     """
     Extracts State from the end of the address line (after Zip removal).
     Priority: 11
     """
 
     priority = 11
+    fields = ("state",)
 
     def __init__(self):
         # Specific to MA requirement but generalizable
         # Could be expanded to list of states
         self.pattern = re.compile(r"(?P<state>MA|MASSACHUSETTS)$", re.IGNORECASE)
 
-    def run(self, ctx: ExtractionContext) -> None:
-        if not ctx.address_line:
-            return
+    def parse(self, address_line: str) -> tuple[str, str] | None:
+        """
+        Split a trailing state off `address_line`.
 
-        match = self.pattern.search(ctx.address_line)
-        if match:
-            # Standardization could happen here (e.g. MASSACHUSETTS -> MA)
-            state = match.group("state").strip().upper()
-            ctx.data["state"] = "MA" if state == "MASSACHUSETTS" else state
-            ctx.address_line = ctx.address_line[: match.start()].strip()
+        Returns:
+          (state, remaining_text), or None if no state was found
+        """
+        match = self.pattern.search(address_line)
+        if not match:
+            return None
+
+        # Standardization could happen here (e.g. MASSACHUSETTS -> MA)
+        state = match.group("state").strip().upper()
+        state = "MA" if state == "MASSACHUSETTS" else state
+        return (state, address_line[: match.start()].strip())
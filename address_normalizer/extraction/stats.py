@@ -0,0 +1,127 @@
+import heapq
+import threading
+from dataclasses import dataclass
+
+
+@dataclass
+class ExtractorStats:
+    calls: int = 0
+    matches: int = 0
+    total_ns: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.matches / self.calls if self.calls else 0.0
+
+
+class PipelineStats:
+    """
+    Cumulative per-extractor timing and match counts for AddressPipeline.
+
+    An extractor "matches" when it adds a component to the parsed result.
+    The `slowest` addresses seen so far are kept with their total parse time,
+    to help find pathological inputs. Recording is thread-safe, and
+    instances pickle cleanly so worker processes can ship them back to be
+    merged.
+    """
+
+    def __init__(self, extractor_names: list[str], slowest: int = 10):
+        self.extractors = {name: ExtractorStats() for name in extractor_names}
+        self.addresses = 0
+        self.total_ns = 0
+        self.max_slowest = slowest
+        self._slowest: list[tuple[int, str]] = []  # min-heap of (ns, address)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(
+        self, address: str, timings: list[tuple[str, int, bool]], total_ns: int
+    ) -> None:
+        """Record one parsed address: (extractor name, ns, matched) per extractor."""
+        with self._lock:
+            self.addresses += 1
+            self.total_ns += total_ns
+            for name, ns, matched in timings:
+                stats = self.extractors[name]
+                stats.calls += 1
+                stats.total_ns += ns
+                stats.matches += matched
+            self._push_slowest(total_ns, address)
+
+    def merge(self, other: "PipelineStats") -> None:
+        """Add the counts of `other` (e.g. from a worker process) to these."""
+        with self._lock:
+            self.addresses += other.addresses
+            self.total_ns += other.total_ns
+            for name, theirs in other.extractors.items():
+                ours = self.extractors.setdefault(name, ExtractorStats())
+                ours.calls += theirs.calls
+                ours.matches += theirs.matches
+                ours.total_ns += theirs.total_ns
+            for ns, address in other._slowest:
+                self._push_slowest(ns, address)
+
+    def drain(self) -> "PipelineStats":
+        """Return a copy of the current counts and reset these to zero."""
+        with self._lock:
+            snapshot = PipelineStats(list(self.extractors), self.max_slowest)
+            snapshot.extractors = self.extractors
+            snapshot.addresses = self.addresses
+            snapshot.total_ns = self.total_ns
+            snapshot._slowest = self._slowest
+
+            self.extractors = {name: ExtractorStats() for name in self.extractors}
+            self.addresses = 0
+            self.total_ns = 0
+            self._slowest = []
+            return snapshot
+
+    def slowest(self) -> list[tuple[float, str]]:
+        """The slowest addresses seen, as (milliseconds, address), slowest first."""
+        with self._lock:
+            ranked = sorted(self._slowest, reverse=True)
+        return [(ns / 1e6, address) for ns, address in ranked]
+
+    def summary(self) -> str:
+        """Render the statistics as a plain-text table."""
+        lines = [
+            f"{'extractor':<26} {'calls':>10} {'matches':>10} {'hit rate':>9} "
+            f"{'total ms':>10} {'mean us':>9} {'share':>7}"
+        ]
+        for name, stats in self.extractors.items():
+            mean_us = stats.total_ns / stats.calls / 1000 if stats.calls else 0.0
+            share = stats.total_ns / self.total_ns if self.total_ns else 0.0
+            lines.append(
+                f"{name:<26} {stats.calls:>10} {stats.matches:>10} "
+                f"{stats.hit_rate:>9.2%} {stats.total_ns / 1e6:>10.1f} "
+                f"{mean_us:>9.2f} {share:>7.1%}"
+            )
+
+        mean_us = self.total_ns / self.addresses / 1000 if self.addresses else 0.0
+        lines.append(
+            f"{'total':<26} {self.addresses:>10} {'':>10} {'':>9} "
+            f"{self.total_ns / 1e6:>10.1f} {mean_us:>9.2f}"
+        )
+
+        slowest = self.slowest()
+        if slowest:
+            lines.append("Slowest addresses:")
+            lines.extend(f"  {ms:>9.3f} ms  {address!r}" for ms, address in slowest)
+
+        return "\n".join(lines)
+
+    def _push_slowest(self, ns: int, address: str) -> None:
+        if self.max_slowest <= 0:
+            return
+        if len(self._slowest) < self.max_slowest:
+            heapq.heappush(self._slowest, (ns, address))
+        elif ns > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, (ns, address))
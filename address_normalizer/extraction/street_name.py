@@ -1,26 +1,30 @@
-from .context import ExtractionContext
+from .base import Extractor
 from .suffix import STREET_SUFFIX_ABBR, normalize_street_suffix
 
 
-class StreetNameTypeExtractor:
+class StreetNameTypeExtractor(Extractor):
     """
     Extracts Street Name and Type from the remainder.
     Priority: 40 (Last)
     """
 
     priority = 40
+    fields = ("street_name", "street_type")
 
     def __init__(self):
         self.suffix_map = STREET_SUFFIX_ABBR
         self.normalize_suffix = normalize_street_suffix
 
-    def run(self, ctx: ExtractionContext) -> None:
-        if not ctx.address_line:
-            return
+    def parse(self, address_line: str) -> tuple[str, str, str]:
+        """
+        Split the remainder into street name and (normalized) street type.
 
-        clean_addr = ctx.address_line.upper()
-        if not clean_addr:
-            return
+        Returns:
+          (street_name, street_type, ""), since nothing is left over.
+          `street_type` is "" when the last word is not a known suffix, in
+          which case the whole text is the name.
+        """
+        clean_addr = address_line.upper()
 
         parts = clean_addr.rsplit(" ", 1)
         if len(parts) == 2:
@@ -29,10 +33,7 @@ class StreetNameTypeExtractor:
 
             # If it's a known suffix (mapped or already abbr)
             if norm_type != possible_type or possible_type in self.suffix_map.values():
-                ctx.data["street_name"] = possible_name
-                ctx.data["street_type"] = norm_type
-            else:
-                # Fallback: treat whole thing as name
-                ctx.data["street_name"] = clean_addr
-        else:
-            ctx.data["street_name"] = clean_addr
+                return (possible_name, norm_type, "")
+
+        # Fallback: treat whole thing as name
+        return (clean_addr, "", "")
@@ -1,9 +1,9 @@
 import re
 
-from .context import ExtractionContext
+from .base import Extractor
 
 
-class UnitExtractor:
+class UnitExtractor(Extractor):
     """
     Extracts Unit/Suite information from address lines.
     Supports old and new formats, including:
@@ -14,19 +14,21 @@ class UnitExtractor:
     """
 
     priority = 20
+    fields = ("unit",)
 
     def __init__(self):
-        # Normalize APT. → APT (allow optional space after dot)
-        self.dot_normalizer = re.compile(r"\b([A-Z]+)\.\s*", re.IGNORECASE)
-
-        # Normalize APT#1 → APT #1
-        self.hash_normalizer = re.compile(r"([A-Z]+)#", re.IGNORECASE)
-
-        # Normalize ordinals: 1ST → 1 ST
-        self.ordinal_normalizer = re.compile(r"(\d+)(ST|ND|RD|TH)\b", re.IGNORECASE)
-
-        # Collapse multiple spaces
-        self.space_normalizer = re.compile(r"\s+")
+        # Single-pass rewrite of the tokens that need a space inserted:
+        #   APT.3 → APT 3   (dot after a word)
+        #   1ST → 1 ST      (ordinals, and 1ST# → 1 ST #)
+        #   APT#1 → APT #1  (hash glued to a word)
+        # Numbers and words are only tried from their first character, which
+        # is where the leftmost match of each rule starts anyway.
+        self.token_normalizer = re.compile(
+            r"\b(?P<dotted>[A-Z]+)\."
+            r"|(?<!\d)(?P<number>\d+)(?P<ordinal>ST|ND|RD|TH)\b(?P<ordinal_hash>#)?"
+            r"|(?<![A-Z])(?P<hashed>[A-Z]+)#",
+            re.IGNORECASE,
+        )
 
         # Main pattern: DESIGNATOR first
         self.designator_pattern = re.compile(
@@ -35,67 +37,66 @@ class UnitExtractor:
         )
 
         # Reversed floor pattern: 1ST FLOOR
+        # Only tried from the first digit of a number: starting mid-number can
+        # never match where the full number did not, and retrying every suffix
+        # of a long digit run is quadratic.
         self.reverse_floor_pattern = re.compile(
-            r"(\d+)\s*(ST|ND|RD|TH)?\s+FLOOR$", re.IGNORECASE
+            r"(?<!\d)(\d+)\s*(ST|ND|RD|TH)?\s+FLOOR$", re.IGNORECASE
         )
 
         # Trailing "#123 LOFT 3" pattern
-        self.hash_leading_pattern = re.compile(r"#\s*([\w-]+(?:\s+\w+)*)$")
+        # Possessive quantifiers: giving back characters of a word can never
+        # make the line end sooner, so backtracking is pure waste on garbage.
+        self.hash_leading_pattern = re.compile(r"#\s*+([\w-]++(?:\s++\w++)*+)$")
 
     # ---------------------------
 
-    def _normalize(self, text: str) -> str:
-        text = text.upper()
-        # Dot after designator → replace with space
-        text = self.dot_normalizer.sub(r"\1 ", text)
-        # APT#1 → APT #1
-        text = self.hash_normalizer.sub(r"\1 #", text)
-        # 1ST → 1 ST
-        text = self.ordinal_normalizer.sub(r"\1 \2", text)
-        # Collapse multiple spaces
-        text = self.space_normalizer.sub(" ", text)
-        return text.strip()
-
-    # ---------------------------
+    def _rewrite_token(self, match: re.Match[str]) -> str:
+        dotted, number, ordinal, ordinal_hash, hashed = match.groups()
+        if dotted:
+            return f"{dotted} "
+        if number:
+            return f"{number} {ordinal} #" if ordinal_hash else f"{number} {ordinal}"
+        return f"{hashed} #"
 
-    def _clean_unit(self, text: str) -> str:
-        """Clean up extra spaces and return standardized unit string."""
-        text = self.space_normalizer.sub(" ", text)
-        return text.strip()
+    def _normalize(self, text: str) -> str:
+        text = self.token_normalizer.sub(self._rewrite_token, text.upper())
+        # Collapse whitespace runs to one space and trim both ends
+        return " ".join(text.split())
 
     # ---------------------------
 
-    def run(self, ctx: ExtractionContext) -> None:
-        if not ctx.address_line:
-            return
+    def parse(self, address_line: str) -> tuple[str, str]:
+        """
+        Split a trailing unit designator off `address_line`.
 
-        addr = self._normalize(ctx.address_line)
+        Returns:
+          (unit, remaining_text). `unit` is "" when no unit was found, in which
+          case `remaining_text` is the normalized address line.
+        """
+        addr = self._normalize(address_line)
 
         # 1️⃣ Check reversed floor (1ST FLOOR)
-        match = self.reverse_floor_pattern.search(addr)
+        match = addr.endswith("FLOOR") and self.reverse_floor_pattern.search(addr)
         if match:
             floor = match.group(1)
-            ctx.data["unit"] = f"FLOOR {floor}"
-            ctx.address_line = addr[: match.start()].strip()
-            return
+            return (f"FLOOR {floor}", addr[: match.start()].strip())
 
         # 2️⃣ Check standard designator (APT, UNIT, SUITE, SPACE, etc.)
         match = self.designator_pattern.search(addr)
         if match:
             desig = match.group(1)
             rest = match.group(2).lstrip("#").strip()  # remove leading #
-            unit = f"{desig} {rest}"
-            ctx.data["unit"] = self._clean_unit(unit)
-            ctx.address_line = addr[: match.start()].strip()
-            return
+            # The normalized line has single spaces, so only a trailing space
+            # is left when nothing follows the designator
+            unit = f"{desig} {rest}".rstrip()
+            return (unit, addr[: match.start()].strip())
 
         # 3️⃣ Check trailing # pattern (e.g., "#803 LOFT 3")
-        match = self.hash_leading_pattern.search(addr)
+        match = "#" in addr and self.hash_leading_pattern.search(addr)
         if match:
             rest = match.group(1)
-            ctx.data["unit"] = f"UNIT {rest}"
-            ctx.address_line = addr[: match.start()].strip()
-            return
+            return (f"UNIT {rest}", addr[: match.start()].strip())
 
         # 4️⃣ No match → leave address_line as-is
-        ctx.address_line = addr
+        return ("", addr)
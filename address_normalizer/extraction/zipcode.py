@@ -1,6 +1,6 @@
 import re
 
-from .context import ExtractionContext
+from .base import Extractor
 
 WORCESTER_COUNTY_ZIPS = [
     "01005",
@@ -106,7 +106,7 @@ WORCESTER_COUNTY_ZIPS = [
 ]
 
 
-class ZipCodeExtractor:
+class ZipCodeExtractor(Extractor):
     """
     Extracts Zip Code from the end of the address line.
     Priority: 10 (First from end)
@@ -116,6 +116,7 @@ class ZipCodeExtractor:
     """
 
     priority = 10
+    fields = ("zip_code",)
 
     def __init__(self):
         # Match 5-digit ZIP, optionally +4
@@ -129,24 +130,30 @@ class ZipCodeExtractor:
         # Worcester County ZIP codes
         self.valid_zips = set(WORCESTER_COUNTY_ZIPS)
 
-    def run(self, ctx: ExtractionContext) -> None:
-        if not ctx.address_line:
-            return
+    def parse(self, address_line: str) -> tuple[str, str] | None:
+        """
+        Split a trailing Worcester County ZIP off `address_line`.
 
-        addr = ctx.address_line.strip()
+        Returns:
+          (zip_code, remaining_text), or None if there is no ZIP to extract
+        """
+        addr = address_line.strip()
         match = self.pattern.search(addr)
 
-        if match:
-            start_pos = match.start()
-            prefix_context = addr[max(0, start_pos - 10) : start_pos].upper()
+        if not match:
+            return None
 
-            # Skip extraction if preceded by UNIT/SUITE/STE or bare #
-            if self.unit_prefix_pattern.search(prefix_context):
-                return
+        start_pos = match.start()
+        prefix_context = addr[max(0, start_pos - 10) : start_pos].upper()
 
-            zip_code = match.group("zip").strip()
+        # Skip extraction if preceded by UNIT/SUITE/STE or bare #
+        if self.unit_prefix_pattern.search(prefix_context):
+            return None
 
-            # Only keep ZIPs that belong to Worcester County
-            if zip_code[:5] in self.valid_zips:
-                ctx.data["zip_code"] = zip_code
-                ctx.address_line = addr[: match.start()].strip()
+        zip_code = match.group("zip").strip()
+
+        # Only keep ZIPs that belong to Worcester County
+        if zip_code[:5] not in self.valid_zips:
+            return None
+
+        return (zip_code, addr[:start_pos].strip())
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import sqlite3
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+
+from .extraction.pipeline import FIELDS, ParsedAddress
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_DIR = Path(__file__).parent / "extraction"
+
+# Keys per SELECT ... IN (...), below SQLite's limit on bound parameters
+LOOKUP_CHUNK = 1000
+
+_COLUMNS = ", ".join(f"{field} TEXT NOT NULL" for field in FIELDS)
+
+# `parsed` holds the results of previous runs. This run's bookkeeping goes to
+# temporary tables, which live in a file of their own and are never
+# journaled, so a batch does not rewrite pages of `parsed` scattered by the
+# random keys. Both are only appended to; save() merges them in key order.
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS parsed (key BLOB PRIMARY KEY, {_COLUMNS}) WITHOUT ROWID;
+CREATE TEMP TABLE used (key BLOB NOT NULL);
+CREATE TEMP TABLE fresh (key BLOB NOT NULL, {_COLUMNS});
+"""
+
+
+def pipeline_fingerprint() -> str:
+    """
+    Hash of the extraction package's source and data files.
+
+    Any change to an extractor, pattern or gazetteer changes the fingerprint,
+    which invalidates manifests written by earlier code.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(EXTRACTION_DIR.rglob("*")):
+        if path.suffix not in (".py", ".csv") or not path.is_file():
+            continue
+        digest.update(path.relative_to(EXTRACTION_DIR).as_posix().encode())
+        digest.update(b"\0")
+        digest.update(path.read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def address_key(address: str) -> bytes:
+    """Content hash of a (stripped) raw address, as stored in the manifest."""
+    return hashlib.blake2b(address.encode("utf-8"), digest_size=16).digest()
+
+
+def _chunks(items: Sequence[bytes], size: int) -> Iterator[Sequence[bytes]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class Manifest:
+    """
+    Sidecar of parsed results from previous runs, keyed by address hash.
+
+    The file is a SQLite database: a header with the pipeline fingerprint
+    and FIELDS, and one row of components per distinct address. Results are
+    looked up a batch at a time, and this run's new results and the keys it
+    used are kept in temporary tables on disk, so memory does not grow with
+    the number of addresses. A manifest written by a different pipeline is
+    emptied, so every address is parsed again; an existing file that is not
+    a manifest is left alone and raises ValueError.
+
+    `get_many` reuses stored results; `put_many` records newly parsed ones.
+    `hits` and `misses` count distinct addresses reused from previous runs
+    and parsed by this one, so an unchanged re-run reuses as many addresses
+    as the run before it parsed. `save` adds this run's results and deletes
+    those it did not use, in one transaction, so addresses that disappeared
+    from the input are pruned.
+    """
+
+    def __init__(self, path: str | Path, fingerprint: str):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self._conn: sqlite3.Connection | None = None
+
+    @classmethod
+    def load(cls, path: str | Path, fingerprint: str) -> "Manifest":
+        manifest = cls(path, fingerprint)
+        manifest.path.parent.mkdir(parents=True, exist_ok=True)
+        manifest._open()
+        return manifest
+
+    def _open(self) -> None:
+        # Only an empty or missing file may become a manifest: anything else
+        # must already be one, so a mistyped path never touches user data
+        existing = self.path.exists() and self.path.stat().st_size > 0
+        self._conn = conn = sqlite3.connect(self.path)
+        stored = self._stored_header() if existing else None
+        if existing and stored is None:
+            self.close()
+            raise ValueError(
+                f"{self.path} exists and is not a manifest; refusing to overwrite it"
+            )
+
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA temp_store=FILE")
+        header = self._header()
+        if stored != header:
+            if stored is not None:
+                logger.info(
+                    f"Manifest {self.path} was written by a different "
+                    "pipeline version; normalizing every row"
+                )
+            conn.execute("DROP TABLE IF EXISTS parsed")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS header "
+                "(name TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO header VALUES ('header', ?)",
+                (json.dumps(header),),
+            )
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+        (count,) = conn.execute("SELECT COUNT(*) FROM parsed").fetchone()
+        logger.info(f"Found {count} parsed addresses in {self.path}")
+
+    def _stored_header(self) -> dict | None:
+        """The header of the manifest at `path`, or None if it is not one."""
+        try:
+            row = self._db.execute(
+                "SELECT value FROM header WHERE name = 'header'"
+            ).fetchone()
+            header = json.loads(row[0]) if row else None
+        except (sqlite3.DatabaseError, ValueError):
+            return None
+        if not isinstance(header, dict) or header.keys() != self._header().keys():
+            return None
+        return header
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise RuntimeError(f"Manifest {self.path} is closed")
+        return self._conn
+
+    def get_many(self, addresses: Sequence[str]) -> list[ParsedAddress | None]:
+        """
+        Return the stored result of each of `addresses`, or None for those
+        that must be parsed. Results stored by a previous run count as hits
+        and are kept by `save`.
+        """
+        keys = [address_key(address) for address in addresses]
+        found: dict[bytes, ParsedAddress] = {}
+        for chunk in _chunks(keys, LOOKUP_CHUNK):
+            found.update(
+                (key, ParsedAddress._make(values))
+                for key, *values in self._db.execute(
+                    f"SELECT * FROM parsed WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+
+        self._db.executemany("INSERT INTO used VALUES (?)", ((key,) for key in found))
+
+        return [found.get(key) for key in keys]
+
+    def put_many(self, results: Iterable[tuple[str, ParsedAddress]]) -> None:
+        """Record newly parsed `(address, components)` pairs from one batch."""
+        with self._db:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO fresh VALUES (?{', ?' * len(FIELDS)})",
+                ((address_key(address), *parsed) for address, parsed in results),
+            )
+
+    @property
+    def hits(self) -> int:
+        (hits,) = self._db.execute("SELECT COUNT(DISTINCT key) FROM used").fetchone()
+        return hits
+
+    @property
+    def misses(self) -> int:
+        (misses,) = self._db.execute("SELECT COUNT(DISTINCT key) FROM fresh").fetchone()
+        return misses
+
+    @property
+    def changed(self) -> bool:
+        """Whether this run parsed new addresses or left stored ones unused."""
+        if self.misses:
+            return True
+        (stored,) = self._db.execute("SELECT COUNT(*) FROM parsed").fetchone()
+        return stored > self.hits
+
+    def save(self) -> None:
+        """Add this run's new results and delete the stored ones it did not use."""
+        with self._db:
+            self._db.execute(
+                "DELETE FROM parsed WHERE key NOT IN (SELECT key FROM used)"
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO parsed SELECT * FROM fresh ORDER BY key"
+            )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _header(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "fields": list(FIELDS),
+        }
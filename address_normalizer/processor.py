@@ -1,8 +1,16 @@
 import csv
 import logging
+import sys
+from collections.abc import Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import chain
 from pathlib import Path
+from typing import Any, NamedTuple
 
-from .extraction.pipeline import AddressPipeline
+from .extraction.pipeline import FIELDS, AddressPipeline, ParsedAddress
+from .extraction.stats import PipelineStats
+from .manifest import Manifest, pipeline_fingerprint
 
 # Setup logging
 logging.basicConfig(
@@ -10,102 +18,436 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Rows read, normalized and written per batch in streaming mode
+DEFAULT_BATCH_SIZE = 10_000
+
+# new columns to append
+NEW_COLUMNS = list(FIELDS)
+
+
+# Pipeline owned by each worker process (see `init_worker`)
+_worker_pipeline: AddressPipeline | None = None
+
+
+def init_worker(instrument: bool = False, time_budget: float | None = None) -> None:
+    """Process pool initializer: build one AddressPipeline per worker."""
+    global _worker_pipeline
+    _worker_pipeline = AddressPipeline(instrument=instrument, time_budget=time_budget)
+
+
+class ChunkResult(NamedTuple):
+    rows: list[ParsedAddress]
+    stats: PipelineStats | None  # gathered for this chunk, when instrumented
+    timed_out: list[str]  # addresses skipped for exceeding the time budget
+
+
+def normalize_chunk(addresses: list[str]) -> ChunkResult:
+    """Normalize a chunk of raw addresses inside a worker process."""
+    if _worker_pipeline is None:
+        init_worker()
+    assert _worker_pipeline is not None
+
+    rows = ParsedAddress.from_columns(_worker_pipeline.run_batch(addresses))
+    stats = _worker_pipeline.stats
+    return ChunkResult(
+        rows,
+        stats.drain() if stats is not None else None,
+        _worker_pipeline.pop_timed_out(),
+    )
+
+
+class RowLayout:
+    """
+    Maps input CSV rows to output rows: the input columns followed by
+    NEW_COLUMNS.
+
+    Rows are handled as plain lists and the parsed components are appended
+    positionally. When column names repeat, within the input header or
+    between it and NEW_COLUMNS, rows are mapped by name with the semantics of
+    csv.DictReader and csv.DictWriter instead: the last column of a given name
+    wins and a colliding input column is overwritten by the parsed value.
+    """
+
+    def __init__(self, fieldnames: list[str], address_column: str):
+        self.fieldnames = fieldnames
+        self.out_fields = fieldnames + NEW_COLUMNS
+        self.by_name = len(set(self.out_fields)) < len(self.out_fields)
+
+        positions = [i for i, name in enumerate(fieldnames) if name == address_column]
+        self.address_index = positions[-1] if positions else None
+
+    def address(self, row: list[str]) -> str:
+        i = self.address_index
+        return row[i] if i is not None and i < len(row) else ""
+
+    def output_row(self, row: list[str], components: list[str]) -> list[str]:
+        width = len(self.fieldnames)
+        if len(row) > width:
+            raise ValueError(
+                f"Row has {len(row)} fields but the header has {width}: {row[:5]}"
+            )
+
+        if self.by_name:
+            # As with DictReader, the columns past the end of a short row are
+            # empty, even where an earlier column of the same name had a value
+            values = dict(zip(self.fieldnames, row, strict=False))
+            values.update((name, "") for name in self.fieldnames[len(row) :])
+            values.update(zip(NEW_COLUMNS, components, strict=True))
+            return [values.get(name, "") for name in self.out_fields]
+
+        if len(row) < width:
+            return row + [""] * (width - len(row)) + components
+        return row + components
+
+
+def peak_rss_mb() -> float | None:
+    """Return the peak resident set size of this process in MiB, if available."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
 
 class CSVProcessor:
     def __init__(
-        self, input_path: str, output_path: str, address_column: str = "Address"
+        self,
+        input_path: str,
+        output_path: str,
+        address_column: str = "Address",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        workers: int = 1,
+        cache_size: int | None = None,
+        profile: bool = False,
+        time_budget: float | None = None,
+        manifest_path: str | None = None,
     ):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        if time_budget is not None and time_budget <= 0:
+            raise ValueError(f"time_budget must be positive, got {time_budget}")
+
         self.input_path = Path(input_path)
         self.output_path = Path(output_path)
         self.address_column = address_column
-        self.pipeline = AddressPipeline()
+        self.batch_size = batch_size
+        self.workers = workers
+        self.pipeline = AddressPipeline(
+            cache_size=cache_size, instrument=profile, time_budget=time_budget
+        )
+        self.timed_out_count = 0
+        self._timed_out: set[str] = set()
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        self.manifest: Manifest | None = None
 
     def safe_int(self, val):
-        """Convert a float or string to int if possible, else return empty string."""
+        """Convert a string to int if possible, else return empty string."""
         if val is None or val == "":
             return ""
         try:
-            return str(int(float(val)))
+            # Not via float(): that loses digits past 2**53
+            return str(int(val))
         except ValueError:
             return str(val)  # fallback
 
+    def format_components(self, parsed: ParsedAddress) -> list[str]:
+        """The output values for NEW_COLUMNS, in order, for one parsed address."""
+        return [
+            self.safe_int(parsed.street_number),
+            self.safe_int(parsed.street_range_to),
+            parsed.street_extension,
+            parsed.street_name,
+            parsed.street_type,
+            parsed.unit,
+            parsed.city or "Worcester",
+            parsed.state or "MA",
+            parsed.zip_code,
+        ]
+
     def process(self):
+        """
+        Normalize the input CSV in streaming mode.
+
+        Rows are read, normalized and written in batches of `batch_size`, so
+        memory stays flat regardless of the input size. With `workers > 1` each
+        batch is split into chunks that are normalized by a process pool and
+        reassembled in input order, so the output is identical to a
+        single-process run. Within a batch, repeated raw addresses are only
+        normalized once; larger batches therefore deduplicate more. With
+        `cache_size` set, an LRU cache in this process also reuses results for
+        addresses repeated across batches. With `profile` set, per-extractor
+        timing and match counts and the slowest addresses are logged at the end.
+        With `time_budget` set, an address that takes longer than that many
+        seconds to parse is logged and written with empty components instead
+        of stalling the run.
+
+        With `manifest_path` set, the parsed components of every distinct
+        address are saved to that sidecar database as each batch is parsed,
+        and looked up there a batch at a time, so memory stays flat. The next
+        run reuses them and only sends new or changed addresses through the
+        pipeline; the output is identical to a full run. Addresses the run
+        did not see are pruned at the end. The manifest is emptied whenever
+        the extraction code or data has changed since it was written.
+
+        Output goes to a temporary sibling file that replaces `output_path` only
+        once the whole input has been processed, so a failed run never leaves a
+        truncated CSV.
+        """
         if not self.input_path.exists():
             logger.error(f"Input file not found: {self.input_path}")
             return
 
-        logger.info(f"Starting processing of {self.input_path}")
+        logger.info(
+            f"Starting processing of {self.input_path} "
+            f"(batch size {self.batch_size}, workers {self.workers})"
+        )
+
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.output_path.with_name(self.output_path.name + ".tmp")
+
+        if self.manifest_path is not None:
+            self.manifest = Manifest.load(self.manifest_path, pipeline_fingerprint())
+
+        pool = (
+            ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=init_worker,
+                initargs=(self.pipeline.stats is not None, self.pipeline.time_budget),
+            )
+            if self.workers > 1
+            else nullcontext()
+        )
 
         try:
-            with open(self.input_path, encoding="utf-8", errors="replace") as infile:
-                reader = csv.DictReader(infile)
-                fieldnames = reader.fieldnames
-
-                # new columns to append
-                new_cols = [
-                    "street_number",
-                    "street_range_to",
-                    "street_extension",
-                    "street_name",
-                    "street_type",
-                    "unit",
-                    "city",
-                    "state",
-                    "zip_code",
-                ]
-
-                # Prepare output fields
-                out_fields = list(fieldnames) + new_cols
-
-                rows_to_write = []
+            with (
+                pool as executor,
+                open(self.input_path, encoding="utf-8", errors="replace") as infile,
+                open(tmp_path, mode="w", encoding="utf-8", newline="") as outfile,
+            ):
+                reader = csv.reader(infile)
+                layout = RowLayout(next(reader, []), self.address_column)
+
+                writer = csv.writer(outfile)
+                writer.writerow(layout.out_fields)
+
                 total_rows = 0
                 success_count = 0
+                unique_count = 0
+                batch: list[list[str]] = []
 
                 for row in reader:
-                    total_rows += 1
-                    raw_address = row.get(self.address_column, "")
+                    if not row:
+                        continue  # blank line, skipped as csv.DictReader does
+                    batch.append(row)
+                    if len(batch) < self.batch_size:
+                        continue
 
-                    # Run Pipeline
-                    data = self.pipeline.run(raw_address)
+                    successes, uniques = self._process_batch(
+                        batch, layout, writer, executor
+                    )
+                    success_count += successes
+                    unique_count += uniques
+                    outfile.flush()
+                    total_rows += len(batch)
+                    batch = []
+                    logger.info(f"Processed {total_rows} rows...")
 
-                    # Enrich row
-                    row["street_number"] = self.safe_int(data.get("street_number", ""))
-                    row["street_range_to"] = self.safe_int(
-                        data.get("street_range_to", "")
+                if batch:
+                    successes, uniques = self._process_batch(
+                        batch, layout, writer, executor
                     )
-                    row["street_extension"] = data.get("street_extension", "")
-                    row["street_name"] = data.get("street_name", "")
-                    row["street_type"] = data.get("street_type", "")
-                    row["unit"] = data.get("unit", "")
-                    row["city"] = data.get("city", "Worcester")
-                    row["state"] = data.get("state", "MA")
-                    row["zip_code"] = data.get("zip_code", "")
-
-                    # Determine Status
-                    # Simple heuristic: if we have number and name, it's a success?
-                    # Or check if address_line is mostly empty?
-                    if data.get("street_number") and data.get("street_name"):
-                        success_count += 1
-
-                    rows_to_write.append(row)
-
-                    if total_rows % 1000 == 0:
-                        logger.info(f"Processed {total_rows} rows...")
-
-                # Write output
-                self.output_path.parent.mkdir(parents=True, exist_ok=True)
-                with open(
-                    self.output_path, mode="w", encoding="utf-8", newline=""
-                ) as outfile:
-                    writer = csv.DictWriter(outfile, fieldnames=out_fields)
-                    writer.writeheader()
-                    writer.writerows(rows_to_write)
+                    success_count += successes
+                    unique_count += uniques
+                    total_rows += len(batch)
+
+            tmp_path.replace(self.output_path)
+            manifest_changed = self.manifest is not None and self.manifest.changed
+            if manifest_changed:
+                self.manifest.save()
 
+            success_rate = success_count / total_rows if total_rows else 0.0
+            peak = peak_rss_mb()
+            peak_msg = f" Peak RSS: {peak:.1f} MiB." if peak is not None else ""
+            dedup_ratio = total_rows / unique_count if unique_count else 1.0
+            logger.info(
+                f"Completed! Processed {total_rows} rows. Success rate: {success_rate:.2%}.{peak_msg}"
+            )
+            logger.info(
+                f"Normalized {unique_count} unique addresses for {total_rows} rows "
+                f"(dedup ratio {dedup_ratio:.2f}x)"
+            )
+            cache_info = self.pipeline.cache_info()
+            if cache_info is not None:
                 logger.info(
-                    f"Completed! Processed {total_rows} rows. Success rate: {success_count / total_rows:.2%}"
+                    f"Cache: {cache_info.hits} hits, {cache_info.misses} misses "
+                    f"({cache_info.hit_rate:.2%} hit rate), {cache_info.evictions} "
+                    f"evictions, {cache_info.currsize}/{cache_info.maxsize} entries"
                 )
-                logger.info(f"Output saved to {self.output_path}")
+            if self.manifest is not None:
+                logger.info(
+                    f"Manifest: reused {self.manifest.hits} parsed addresses, "
+                    f"normalized {self.manifest.misses}"
+                    + (
+                        f"; saved to {self.manifest.path}"
+                        if manifest_changed
+                        else "; unchanged"
+                    )
+                )
+            if self.timed_out_count:
+                logger.warning(
+                    f"Skipped {self.timed_out_count} addresses that exceeded the "
+                    f"{self.pipeline.time_budget}s time budget"
+                )
+            if self.pipeline.stats is not None:
+                logger.info(f"Extractor profile:\n{self.pipeline.stats.summary()}")
+            logger.info(f"Output saved to {self.output_path}")
 
         except Exception as e:
+            tmp_path.unlink(missing_ok=True)
             logger.error(f"Failed to process CSV: {e}")
             raise
+        finally:
+            if self.manifest is not None:
+                self.manifest.close()
+
+    def _process_batch(
+        self,
+        batch: list[list[str]],
+        layout: RowLayout,
+        writer: Any,
+        executor: Executor | None = None,
+    ) -> tuple[int, int]:
+        """
+        Normalize and write one batch of rows.
+
+        Each distinct raw address in the batch is run through the pipeline once
+        and its components are broadcast back to every row that shares it.
+        The pipeline strips its input, so addresses that differ only in
+        surrounding whitespace share a result.
+
+        Returns:
+          (success_count, unique_address_count)
+        """
+        keys = [layout.address(row).strip() for row in batch]
+        unique = list(dict.fromkeys(keys))
+
+        # Run Pipeline, and format each distinct result once
+        parsed_unique = self._normalize(unique, executor)
+        components = {
+            key: self.format_components(parsed)
+            for key, parsed in zip(unique, parsed_unique, strict=True)
+        }
+
+        # Determine Status
+        # Simple heuristic: if we have number and name, it's a success
+        succeeded = {
+            key
+            for key, parsed in zip(unique, parsed_unique, strict=True)
+            if parsed.street_number and parsed.street_name
+        }
+        success_count = sum(key in succeeded for key in keys)
+
+        writer.writerows(
+            layout.output_row(row, components[key])
+            for row, key in zip(batch, keys, strict=True)
+        )
+        return success_count, len(unique)
+
+    def _normalize(
+        self, addresses: list[str], executor: Executor | None = None
+    ) -> list[ParsedAddress]:
+        """Run the pipeline over `addresses`, in order, locally or on the pool."""
+        # Consult the cache and manifest here rather than in the workers so
+        # that a single cache (and a single set of statistics) is shared by the
+        # whole pool. Entries are immutable tuples, so no copy is needed.
+        cache = self.pipeline.cache
+        manifest = self.manifest
+        cached = self._lookup(addresses)
+        misses = [
+            address
+            for address, data in zip(addresses, cached, strict=True)
+            if data is None
+        ]
+
+        # Timed-out addresses are reported by _collect before their rows are
+        # consumed below, and are kept out of the cache and manifest so that a
+        # later run retries them
+        self._timed_out.clear()
+        computed: Iterator[ParsedAddress]
+        if executor is None:
+            computed = iter(
+                self._collect(
+                    ChunkResult(
+                        ParsedAddress.from_columns(self.pipeline.run_batch(misses)),
+                        None,
+                        self.pipeline.pop_timed_out(),
+                    )
+                )
+            )
+        else:
+            # A few chunks per worker keeps the pool busy when chunks finish
+            # unevenly
+            chunk_size = max(1, -(-len(misses) // (self.workers * 4)))
+            chunks = [
+                misses[i : i + chunk_size] for i in range(0, len(misses), chunk_size)
+            ]
+            # Executor.map yields results in submission order
+            computed = chain.from_iterable(
+                self._collect(result)
+                for result in executor.map(normalize_chunk, chunks)
+            )
+
+        parsed = []
+        fresh = []
+        for address, data in zip(addresses, cached, strict=True):
+            if data is None:
+                data = next(computed)
+                if address not in self._timed_out:
+                    if cache is not None:
+                        cache.put(address, data)
+                    if manifest is not None:
+                        fresh.append((address, data))
+            parsed.append(data)
+
+        if manifest is not None:
+            manifest.put_many(fresh)
+        return parsed
+
+    def _lookup(self, addresses: list[str]) -> list[ParsedAddress | None]:
+        """Return the known result of each of `addresses` from the cache or manifest."""
+        cache = self.pipeline.cache
+        known = [
+            cache.get(address) if cache is not None else None for address in addresses
+        ]
+        if self.manifest is None:
+            return known
+
+        unknown = [i for i, data in enumerate(known) if data is None]
+        stored = self.manifest.get_many([addresses[i] for i in unknown])
+        for i, data in zip(unknown, stored, strict=True):
+            if data is not None:
+                known[i] = data
+                if cache is not None:
+                    cache.put(addresses[i], data)
+        return known
+
+    def _collect(self, result: ChunkResult) -> list[ParsedAddress]:
+        """Merge a chunk's statistics and report its timeouts; return its rows."""
+        if result.stats is not None and self.pipeline.stats is not None:
+            self.pipeline.stats.merge(result.stats)
+
+        for address in result.timed_out:
+            logger.warning(
+                f"Skipped address exceeding the time budget: {address[:120]!r}"
+            )
+        self.timed_out_count += len(result.timed_out)
+        self._timed_out.update(result.timed_out)
+
+        return result.rows
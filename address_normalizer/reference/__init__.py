@@ -0,0 +1,9 @@
+"""
+Frozen copies of extractors that were rewritten for speed.
+
+Each module is the extractor as of the baseline commit (1b2ab98), before
+any of the rewrites, copied verbatim apart from its relative imports, so
+address_normalizer.differential checks the current extractor against the
+original code rather than an intermediate version. Nothing here is used by the
+pipeline, and nothing here should be changed.
+"""
@@ -0,0 +1,358 @@
+"""
+Local HTTP service that normalizes addresses with AddressPipeline.
+
+Keeps a pool of worker processes and a shared result cache warm between
+requests, so callers pay neither interpreter startup nor re-parsing:
+
+    python -m address_normalizer.server --port 8090 --workers 4
+
+Endpoints:
+  POST /normalize  {"addresses": ["12 Main St Worcester MA", ...]}
+                   -> {"count": n, "fields": [...], "results": {field: [...]},
+                       "timed_out": [...]}
+  GET  /stats      request, address and cache counts, throughput and latency
+  GET  /health     {"status": "ok"}
+
+`results` is columnar: one list per field in FIELDS, aligned with the input
+addresses, with "" for components that were not found.
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import chain
+from typing import Any
+
+from .extraction.budget import budget_ms
+from .extraction.cache import LRUCache
+from .extraction.pipeline import FIELDS, ParsedAddress
+from .processor import init_worker, normalize_chunk
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8090
+
+# Largest batch accepted by POST /normalize
+MAX_ADDRESSES = 100_000
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+# Smallest chunk sent to one worker; smaller requests use fewer workers
+MIN_CHUNK_SIZE = 256
+
+
+class ServiceStats:
+    """Thread-safe request, address and latency counters for the service."""
+
+    def __init__(self, window: int = 1000):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.addresses = 0
+        self.unique = 0
+        self.parsed = 0
+        self.timed_out = 0
+        self.busy_s = 0.0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(
+        self, addresses: int, unique: int, parsed: int, timed_out: int, seconds: float
+    ) -> None:
+        with self._lock:
+            self.requests += 1
+            self.addresses += addresses
+            self.unique += unique
+            self.parsed += parsed
+            self.timed_out += timed_out
+            self.busy_s += seconds
+            self._latencies.append(seconds)
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            snapshot: dict[str, Any] = {
+                "uptime_s": round(time.monotonic() - self.started, 3),
+                "requests": self.requests,
+                "errors": self.errors,
+                "addresses": self.addresses,
+                "unique_addresses": self.unique,
+                "parsed_addresses": self.parsed,
+                "timed_out": self.timed_out,
+                "addresses_per_sec": (
+                    round(self.addresses / self.busy_s, 1) if self.busy_s else None
+                ),
+            }
+
+        def percentile(q: float) -> float:
+            index = min(len(latencies) - 1, max(0, round(q * len(latencies)) - 1))
+            return round(latencies[index] * 1000, 3)
+
+        snapshot["latency_ms"] = (
+            {
+                "window": len(latencies),
+                "p50": percentile(0.50),
+                "p90": percentile(0.90),
+                "p99": percentile(0.99),
+                "max": round(latencies[-1] * 1000, 3),
+            }
+            if latencies
+            else None
+        )
+        return snapshot
+
+
+class NormalizationService:
+    """
+    Normalizes batches of addresses on a process pool with a shared cache.
+
+    Each request is deduplicated, looked up in the LRU cache held by this
+    process, and only the misses are split across the worker processes (one
+    AddressPipeline each). Safe to call from many threads at once.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        cache_size: int | None = 100_000,
+        time_budget: float | None = None,
+    ):
+        if workers is not None and workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+
+        self.workers = workers or os.cpu_count() or 1
+
+        self.cache = LRUCache(cache_size) if cache_size else None
+        self.stats = ServiceStats()
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(False, time_budget),
+        )
+
+    def normalize(self, addresses: list[str | None]) -> dict[str, Any]:
+        """Parse `addresses` and return the columnar response body."""
+        start = time.perf_counter()
+
+        lines = [a.strip() if isinstance(a, str) else "" for a in addresses]
+        unique = list(dict.fromkeys(lines))
+
+        cache = self.cache
+        parsed: dict[str, ParsedAddress] = {}
+        misses = []
+        for line in unique:
+            data = cache.get(line) if cache is not None else None
+            if data is None:
+                misses.append(line)
+            else:
+                parsed[line] = data
+
+        timed_out: list[str] = []
+        if misses:
+            chunk_size = max(MIN_CHUNK_SIZE, -(-len(misses) // self.workers))
+            chunks = [
+                misses[i : i + chunk_size] for i in range(0, len(misses), chunk_size)
+            ]
+            results = list(self.executor.map(normalize_chunk, chunks))
+            timed_out = list(chain.from_iterable(r.timed_out for r in results))
+            skipped = set(timed_out)
+
+            computed = chain.from_iterable(r.rows for r in results)
+            for line, data in zip(misses, computed, strict=True):
+                parsed[line] = data
+                if cache is not None and line not in skipped:
+                    cache.put(line, data)
+
+        rows = [parsed[line] for line in lines]
+        columns = {field: [row[i] for row in rows] for i, field in enumerate(FIELDS)}
+
+        self.stats.record(
+            len(lines),
+            len(unique),
+            len(misses),
+            len(timed_out),
+            time.perf_counter() - start,
+        )
+        return {
+            "count": len(lines),
+            "fields": list(FIELDS),
+            "results": columns,
+            "timed_out": timed_out,
+        }
+
+    def stats_snapshot(self) -> dict[str, Any]:
+        snapshot = self.stats.snapshot()
+        snapshot["workers"] = self.workers
+        info = self.cache.info() if self.cache is not None else None
+        snapshot["cache"] = (
+            {**info._asdict(), "hit_rate": round(info.hit_rate, 4)} if info else None
+        )
+        return snapshot
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+
+class NormalizationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: NormalizationService):
+        super().__init__(address, NormalizationHandler)
+        self.service = service
+
+
+class NormalizationHandler(BaseHTTPRequestHandler):
+    """JSON endpoints for NormalizationService (see module docstring)."""
+
+    server: NormalizationServer
+    # Keep connections open between requests from the same client
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json_response(self.server.service.stats_snapshot(), 200)
+        elif self.path == "/health":
+            self.send_json_response({"status": "ok"}, 200)
+        else:
+            self.send_json_response({"error": "Not Found"}, 404)
+
+    def do_POST(self):
+        if self.path == "/normalize":
+            self.handle_normalize()
+        else:
+            self.send_json_response({"error": "Not Found"}, 404)
+
+    def handle_normalize(self):
+        """Parse a JSON batch of addresses and reply with columnar results."""
+        service = self.server.service
+        body = self.read_body()
+        if body is None:
+            return
+
+        try:
+            data = json.loads(body)
+            addresses = data.get("addresses") if isinstance(data, dict) else None
+            if not isinstance(addresses, list):
+                service.stats.record_error()
+                self.send_json_response({"error": 'Expected {"addresses": [...]}'}, 400)
+                return
+            if len(addresses) > MAX_ADDRESSES:
+                service.stats.record_error()
+                self.send_json_response(
+                    {"error": f"At most {MAX_ADDRESSES} addresses per request"}, 413
+                )
+                return
+
+            self.send_json_response(service.normalize(addresses), 200)
+
+        except json.JSONDecodeError:
+            service.stats.record_error()
+            self.send_json_response({"error": "Invalid JSON"}, 400)
+        except Exception as e:
+            service.stats.record_error()
+            logger.exception("Failed to normalize request")
+            self.send_json_response({"error": str(e)}, 500)
+
+    def read_body(self) -> bytes | None:
+        """
+        Read the request body, sized by Content-Length.
+
+        Replies 411, 400 or 413 and returns None when the length is missing,
+        not a non-negative integer, or over MAX_BODY_BYTES. The unread body
+        would be taken for the next request, so the connection is closed.
+        """
+        header = self.headers.get("Content-Length")
+        if header is None:
+            error, status = "Content-Length required", 411
+        elif not (header.strip().isascii() and header.strip().isdigit()):
+            error, status = f"Invalid Content-Length: {header!r}", 400
+        elif int(header) > MAX_BODY_BYTES:
+            error, status = f"Request body larger than {MAX_BODY_BYTES} bytes", 413
+        else:
+            return self.rfile.read(int(header))
+
+        self.server.service.stats.record_error()
+        self.close_connection = True
+        self.send_json_response({"error": error}, status)
+        return None
+
+    def send_json_response(self, data: dict, status: int):
+        """Send JSON response."""
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        """Per-request logs at debug level; the service logs its own summary."""
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve address normalization over HTTP on this machine."
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port",
+        "-p",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on (default: {DEFAULT_PORT})",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help="Worker processes used for normalization (default: CPU count)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=100_000,
+        help="Entries in the shared result cache, 0 to disable (default: 100000)",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=budget_ms,
+        default=None,
+        help="Skip any address that takes longer than this many milliseconds to parse",
+    )
+    args = parser.parse_args()
+
+    service = NormalizationService(
+        workers=args.workers,
+        cache_size=args.cache_size,
+        time_budget=args.time_budget / 1000 if args.time_budget is not None else None,
+    )
+    server = NormalizationServer((args.host, args.port), service)
+    logger.info(
+        f"Address normalizer listening on http://{args.host}:{args.port} "
+        f"({service.workers} workers, cache size {args.cache_size or 'off'})"
+    )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down...")
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Asyncio geocoding engine for large inputs.
+
+Rather than a thread and a future per row, one event loop keeps at most
+`concurrency` requests in flight over a pool of keep-alive HTTP/1.1
+connections to the local Nominatim. Addresses are pulled lazily from any
+iterable and results come back in input order, so memory is bounded by the
+in-flight window instead of the size of the input:
+
+    for result in geocode_stream(addresses, concurrency=32, cache=cache):
+        ...
+
+The HTTP client only needs to talk to a local Nominatim, so it is kept
+minimal: plain http, GET requests, Content-Length or chunked bodies. It
+retries the same statuses as the requests session in geocoder.py.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, Iterable, Iterator
+from typing import Any
+from urllib.parse import urlencode, urlsplit
+
+from .cache import GeocodeCache
+from .geocoder import (
+    DEFAULT_WORKERS,
+    HEADERS,
+    RETRY_STATUSES,
+    SEARCH_URL,
+    GeocodeResult,
+    Query,
+    SearchError,
+    _cache_get,
+    _cache_put,
+    _empty_result,
+    _failed_result,
+    _parse_search,
+    _search_params,
+    _search_plan,
+    query_text,
+)
+from .limiter import AdaptiveLimiter
+from .metrics import EMPTY, FOUND, GeocodeMetrics, failure_kind
+
+CONNECT_TIMEOUT = 3
+READ_TIMEOUT = 15
+
+# Same policy as the Retry adapter of the requests session
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+
+# Addresses started but not yet yielded, per request in flight. Results are
+# yielded in input order, so the window lets later addresses keep the
+# connections busy while an earlier one waits out a retry backoff.
+WINDOW_FACTOR = 64
+
+Connection = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"HTTP {status} {reason}")
+        self.status = status
+
+
+class NominatimClient:
+    """
+    Keep-alive connection pool for GET requests to one HTTP server.
+
+    At most `max_connections` requests are in flight at once, or fewer if
+    `limiter` allows fewer; each reports its latency to it, or that it
+    failed or was retried. Retries are also counted in `metrics`. Connections
+    are returned to the pool after each response unless the server asked to
+    close them; a pooled connection the server has since closed is dropped
+    and the request is resent on a new one.
+    """
+
+    def __init__(
+        self,
+        base_url: str = SEARCH_URL,
+        max_connections: int = 1,
+        limiter: AdaptiveLimiter | None = None,
+        metrics: GeocodeMetrics | None = None,
+    ):
+        url = urlsplit(base_url)
+        if url.scheme != "http":
+            raise ValueError(f"Only http:// URLs are supported, got {base_url}")
+
+        self.host = url.hostname or "localhost"
+        self.port = url.port or 80
+        self.path = url.path or "/"
+        self._host_header = url.netloc
+        self._idle: list[Connection] = []
+        self._slots = asyncio.Semaphore(max_connections)
+        self.limiter = limiter
+        self.metrics = metrics
+        self._released = asyncio.Condition()
+
+    async def get_json(self, params: dict[str, Any]) -> tuple[Any, float]:
+        """
+        GET the base URL with `params` and decode the JSON response.
+
+        Also returns the seconds spent on the request and any retries, not
+        counting time spent waiting for a free connection; a failure raises
+        SearchError with the same seconds. Like a worker of the threaded
+        engine, a request keeps its slot through its retries.
+        """
+        target = f"{self.path}?{urlencode(params)}"
+        async with self._slots:
+            if self.limiter is not None:
+                async with self._released:
+                    await self._released.wait_for(self.limiter.try_acquire)
+
+            started = time.perf_counter()
+            overloaded = True
+            try:
+                for attempt in range(RETRIES + 1):
+                    try:
+                        status, reason, body = await self._request(target)
+                    except (OSError, asyncio.IncompleteReadError):
+                        if attempt == RETRIES:
+                            raise
+                    else:
+                        if status not in RETRY_STATUSES:
+                            # A retried request means the server was
+                            # overloaded, even if the retry went through
+                            overloaded = attempt > 0
+                            if status != 200:
+                                raise HTTPStatusError(status, reason)
+                            return json.loads(body), time.perf_counter() - started
+                        if attempt == RETRIES:
+                            raise HTTPStatusError(status, reason)
+
+                    if self.limiter is not None:
+                        self.limiter.report_overload(started)
+                    if self.metrics is not None:
+                        self.metrics.record_retry()
+                    # Like urllib3: retry at once, then back off exponentially
+                    if attempt:
+                        await asyncio.sleep(BACKOFF_FACTOR * 2**attempt)
+            except Exception as e:
+                raise SearchError(e, time.perf_counter() - started) from e
+            finally:
+                if self.limiter is not None:
+                    self.limiter.release(started, overloaded)
+                    async with self._released:
+                        self._released.notify_all()
+
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    async def _request(self, target: str) -> tuple[int, str, bytes]:
+        while self._idle:
+            conn = self._idle.pop()
+            try:
+                return await self._exchange(conn, target)
+            except (OSError, asyncio.IncompleteReadError):
+                # Closed by the server while idle; GET is safe to resend
+                continue
+
+        conn = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), CONNECT_TIMEOUT
+        )
+        return await self._exchange(conn, target)
+
+    async def _exchange(self, conn: Connection, target: str) -> tuple[int, str, bytes]:
+        reader, writer = conn
+        headers = {**HEADERS, "Host": self._host_header, "Accept": "application/json"}
+        request = f"GET {target} HTTP/1.1\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+        try:
+            writer.write(request.encode("latin-1") + b"\r\n")
+            status, reason, body, keep_alive = await asyncio.wait_for(
+                self._read_response(reader), READ_TIMEOUT
+            )
+        except BaseException:
+            writer.close()
+            raise
+
+        if keep_alive:
+            self._idle.append(conn)
+        else:
+            writer.close()
+        return status, reason, body
+
+    @staticmethod
+    async def _read_response(
+        reader: asyncio.StreamReader,
+    ) -> tuple[int, str, bytes, bool]:
+        status_line = (await reader.readuntil(b"\r\n")).decode("latin-1")
+        version, status, *reason = status_line.rstrip("\r\n").split(" ", 2)
+
+        headers = {}
+        while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            keep_alive = connection != "close"
+        else:
+            keep_alive = connection == "keep-alive"
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while size := int((await reader.readuntil(b"\r\n")).split(b";")[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            while await reader.readuntil(b"\r\n") != b"\r\n":
+                pass  # trailers
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+
+        return int(status), " ".join(reason), body, keep_alive
+
+
+async def geocode_async(
+    query: Query,
+    client: NominatimClient,
+    cache: GeocodeCache | None = None,
+    metrics: GeocodeMetrics | None = None,
+) -> GeocodeResult:
+    """Async counterpart of geocoder.geocode, with the same caching rules."""
+    if not query_text(query).strip():
+        return _empty_result()
+
+    # SQLite lookups take microseconds, so they run on the event loop
+    cached = _cache_get(query, cache, metrics)
+    if cached is not None:
+        return cached
+
+    for mode, search in _search_plan(query):
+        try:
+            data, seconds = await client.get_json(_search_params(search))
+            try:
+                result = _parse_search(data)
+            except Exception as e:
+                raise SearchError(e, seconds) from e
+        except SearchError as e:
+            if metrics is not None:
+                metrics.record(mode, e.seconds, failure_kind(e.error))
+            print(f"Geocode failed: {query_text(query)} -> {e.error}")
+
+            return _failed_result(e.error)
+
+        found = result["latitude"] is not None
+        if metrics is not None:
+            metrics.record(mode, seconds, FOUND if found else EMPTY)
+        if found:
+            break
+
+    _cache_put(query, result, cache)
+
+    return result
+
+
+async def geocode_stream_async(
+    addresses: Iterable[Query],
+    concurrency: int | None = None,
+    base_url: str = SEARCH_URL,
+    cache: GeocodeCache | None = None,
+    metrics: GeocodeMetrics | None = None,
+    limiter: AdaptiveLimiter | None = None,
+) -> AsyncGenerator[GeocodeResult]:
+    """
+    Geocode `addresses` with up to `concurrency` requests in flight, or as
+    many as `limiter` allows below that, and yield the results in input order.
+    """
+    if concurrency is None:
+        concurrency = DEFAULT_WORKERS
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+
+    client = NominatimClient(base_url, concurrency, limiter, metrics)
+    window: deque[asyncio.Task[GeocodeResult]] = deque()
+    try:
+        for address in addresses:
+            window.append(
+                asyncio.create_task(geocode_async(address, client, cache, metrics))
+            )
+            if len(window) >= concurrency * WINDOW_FACTOR:
+                yield await window.popleft()
+
+        while window:
+            yield await window.popleft()
+    finally:
+        for task in window:
+            task.cancel()
+        await asyncio.gather(*window, return_exceptions=True)
+        client.close()
+
+
+def geocode_stream(
+    addresses: Iterable[Query],
+    concurrency: int | None = None,
+    base_url: str = SEARCH_URL,
+    cache: GeocodeCache | None = None,
+    metrics: GeocodeMetrics | None = None,
+    limiter: AdaptiveLimiter | None = None,
+) -> Iterator[GeocodeResult]:
+    """Run geocode_stream_async on a private event loop, for synchronous callers."""
+    stream = geocode_stream_async(
+        addresses, concurrency, base_url, cache, metrics, limiter
+    )
+
+    # Runner.run() only accepts coroutines
+    async def next_result() -> GeocodeResult:
+        return await anext(stream)
+
+    async def close() -> None:
+        await stream.aclose()
+
+    with asyncio.Runner() as runner:
+        try:
+            while True:
+                try:
+                    yield runner.run(next_result())
+                except StopAsyncIteration:
+                    return
+        finally:
+            runner.run(close())
@@ -0,0 +1,381 @@
+"""
+Throughput and load-test harness for the geocoding engines.
+
+Geocodes addresses with each engine in ENGINES, for every worker count and
+query mode, and reports rows/sec plus the request count, hit rate and
+latency percentiles of each kind of search. The cache is not used, so every
+distinct address is at least one request. Addresses are synthetic, or built
+from a normalized CSV exactly as geocode_csv builds them (--input).
+
+Against a running Nominatim (or anything that answers /search like one):
+
+    python -m dataset_geocoder.benchmark --rows 20000 --workers 8 16 32
+    python -m dataset_geocoder.benchmark --query-mode text structured
+
+Against the stand-in from mock_nominatim, started in-process with injected
+latency, errors and a concurrency limit:
+
+    python -m dataset_geocoder.benchmark --mock --latency 20 --jitter 10 \\
+        --error-rate 0.02 --throttle-rate 0.01 --max-concurrency 8 --workers 4 8 16
+
+When the server reports its own counts (the stand-in's /stats), the harness
+also shows the requests it actually received, which include retries, and the
+429 and 5xx responses it sent.
+
+With --adaptive, --workers is the most requests in flight and an
+AdaptiveLimiter picks the actual number; its final, mean and peak limit are
+reported with each run. --check-limit also fails the run unless the mean
+limit settled near the stand-in's --max-concurrency, the most it can work on
+without queueing:
+
+    python -m dataset_geocoder.benchmark --mock --latency 10 --max-concurrency 4 \\
+        --workers 32 --adaptive --check-limit
+
+--memory also traces Python allocations and reports each engine's peak. The
+tracing slows both engines down, so compare throughput from runs without it.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+
+from .async_geocoder import geocode_stream
+from .csv_io import READ_OPTIONS
+from .geocoder import (
+    DEFAULT_WORKERS,
+    ENGINES,
+    QUERY_MODES,
+    SEARCH_URL,
+    Query,
+    StructuredQuery,
+    build_address,
+    build_query,
+    geocode_bulk,
+)
+from .limiter import DEFAULT_BACKOFF, AdaptiveLimiter
+from .metrics import GeocodeMetrics
+from .mock_nominatim import add_mock_arguments, mock_from_args, serve_in_background
+
+STREETS = [
+    "Main St",
+    "Park Ave",
+    "Shrewsbury St",
+    "Pleasant St",
+    "Chandler St",
+    "Highland St",
+    "Lincoln St",
+    "Belmont St",
+    "Grafton St",
+    "Salisbury St",
+    "Burncoat St",
+    "June St",
+    "Elm St",
+    "Cambridge St",
+    "Southbridge St",
+    "Front St",
+    "Water St",
+    "Mill St",
+]
+
+ZIPS = ["01602", "01603", "01604", "01605", "01606", "01607", "01608", "01609"]
+
+
+def generate_addresses(
+    rows: int, seed: int = 0, query_mode: str = "text"
+) -> Iterator[Query]:
+    """Yield `rows` synthetic addresses; the same seed gives the same addresses."""
+    rng = random.Random(seed)
+    for _ in range(rows):
+        query = StructuredQuery(
+            f"{rng.randint(1, 999)} {rng.choice(STREETS)}",
+            "Worcester",
+            "MA",
+            rng.choice(ZIPS),
+        )
+        yield query if query_mode == "structured" else query.text()
+
+
+def load_addresses(
+    input_file: str, query_mode: str = "text", rows: int | None = None
+) -> list[Query]:
+    """The distinct queries geocode_csv would send for `input_file`."""
+    df = pd.read_csv(input_file, nrows=rows, **READ_OPTIONS)
+    builder = build_query if query_mode == "structured" else build_address
+    return list(dict.fromkeys(builder(row) for row in df.itertuples(index=False)))
+
+
+def server_stats(base_url: str) -> dict[str, Any] | None:
+    """The server's own request counts, if it reports them (the stand-in does)."""
+    url = urlsplit(base_url)
+    try:
+        r = requests.get(f"{url.scheme}://{url.netloc}/stats", timeout=(3, 15))
+        r.raise_for_status()
+        stats = r.json()
+    except (requests.RequestException, ValueError):
+        return None
+    return stats if isinstance(stats, dict) and "statuses" in stats else None
+
+
+def bench_engine(
+    engine: str,
+    addresses: list[Query],
+    workers: int,
+    base_url: str = SEARCH_URL,
+    memory: bool = False,
+    adaptive: bool = False,
+) -> dict[str, Any]:
+    """Geocode `addresses` with `engine` and time it."""
+    limiter = AdaptiveLimiter(workers) if adaptive else None
+    metrics = GeocodeMetrics(keep_latencies=True, limiter=limiter)
+    before = server_stats(base_url)
+    if memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    if engine == "async":
+        found = sum(
+            r["latitude"] is not None
+            for r in geocode_stream(
+                addresses, workers, base_url, metrics=metrics, limiter=limiter
+            )
+        )
+    else:
+        results = geocode_bulk(
+            addresses, workers, base_url=base_url, metrics=metrics, limiter=limiter
+        )
+        found = sum(r["latitude"] is not None for r in results)
+    total = time.perf_counter() - start
+
+    rows = len(addresses)
+    structured = any(isinstance(a, StructuredQuery) for a in addresses)
+    summary: dict[str, Any] = {
+        "engine": engine,
+        "query_mode": "structured" if structured else "text",
+        "workers": workers,
+        "rows": rows,
+        "found": found,
+        "failed": sum(s.errors for s in metrics.modes.values()),
+        "failures": metrics.failures(),
+        "retries": metrics.retries,
+        "total_s": round(total, 3),
+        "rows_per_sec": round(rows / total, 1) if total else None,
+        "searches": {
+            mode: {
+                "requests": s.requests,
+                "hit_rate": round(s.hit_rate, 4),
+                "mean_ms": round(s.mean_ms, 3),
+                "p50_ms": round(s.percentile_ms(50) or 0, 3),
+                "p90_ms": round(s.percentile_ms(90) or 0, 3),
+                "p99_ms": round(s.percentile_ms(99) or 0, 3),
+                "max_ms": round(s.max_seconds * 1000, 3),
+            }
+            for mode, s in metrics.modes.items()
+        },
+    }
+    if limiter is not None:
+        summary["limiter"] = limiter.snapshot()
+    if memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        summary["peak_mb"] = round(peak / 2**20, 1)
+
+    after = server_stats(base_url)
+    if before is not None and after is not None:
+        statuses = {
+            status: count - before["statuses"].get(status, 0)
+            for status, count in after["statuses"].items()
+        }
+        served = after["requests"] - before["requests"]
+        summary["server"] = {
+            "requests": served,
+            # Every search is one request, plus one per retry
+            "retries": served - sum(s.requests for s in metrics.modes.values()),
+            "throttled": statuses.get("429", 0),
+            "server_errors": sum(
+                count for status, count in statuses.items() if status.startswith("5")
+            ),
+            "peak_in_flight": after["peak_in_flight"],
+        }
+    return summary
+
+
+def print_report(results: list[dict[str, Any]]) -> None:
+    memory = "peak_mb" in results[0]
+    server = "server" in results[0]
+    print(
+        f"{'engine':<8} {'query':<10} {'workers':>7} {'rows':>8} {'found':>8} "
+        f"{'failed':>6} {'rows/s':>10}"
+        + (f" {'retries':>7} {'429':>6} {'5xx':>6}" if server else "")
+        + (f" {'peak MB':>8}" if memory else "")
+    )
+    for r in results:
+        line = (
+            f"{r['engine']:<8} {r['query_mode']:<10} {r['workers']:>7} "
+            f"{r['rows']:>8} {r['found']:>8} {r['failed']:>6} "
+            f"{r['rows_per_sec']:>10,.0f}"
+        )
+        if server:
+            s = r["server"]
+            line += f" {s['retries']:>7} {s['throttled']:>6} {s['server_errors']:>6}"
+        if memory:
+            line += f" {r['peak_mb']:>8.1f}"
+        print(line)
+        for mode, s in r["searches"].items():
+            print(
+                f"    {mode:<10} {s['requests']:>8} requests, "
+                f"{s['hit_rate']:.1%} found, ms mean {s['mean_ms']:.2f} "
+                f"p50 {s['p50_ms']:.2f} p90 {s['p90_ms']:.2f} "
+                f"p99 {s['p99_ms']:.2f} max {s['max_ms']:.2f}"
+            )
+        if "limiter" in r:
+            s = r["limiter"]
+            print(
+                f"    limit      {s['limit']:>8} at the end, mean {s['mean_limit']:.1f}, "
+                f"peak {s['peak_limit']}, {s['decreases']} decreases"
+            )
+
+
+def check_limits(results: list[dict[str, Any]], max_concurrency: int) -> list[str]:
+    """
+    The runs whose adaptive limit did not settle near `max_concurrency`.
+
+    Above it, searches queue in the server; a mean limit over twice that means
+    the limiter did not back off. A mean below one decrease from it means the
+    limiter backed off from a server that was keeping up.
+    """
+    low, high = max_concurrency * DEFAULT_BACKOFF, max_concurrency * 2
+    failures = []
+    for r in results:
+        mean = r["limiter"]["mean_limit"]
+        if not low <= mean <= high:
+            failures.append(
+                f"{r['engine']} {r['query_mode']} {r['workers']} workers: "
+                f"mean limit {mean:.1f}, expected {low:g}-{high:g}"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-test the geocoding engines against Nominatim or a stand-in."
+    )
+    parser.add_argument(
+        "--rows",
+        "-n",
+        type=int,
+        default=10_000,
+        help="Synthetic addresses, or CSV rows read with --input (default: 10000)",
+    )
+    parser.add_argument(
+        "--input", "-i", help="Normalized CSV to build addresses from, as geocode_csv"
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        nargs="+",
+        default=[DEFAULT_WORKERS],
+        help=f"Concurrent requests; several values run one pass each "
+        f"(default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        nargs="+",
+        default=list(ENGINES),
+        help="Engines to run (default: all)",
+    )
+    parser.add_argument(
+        "--query-mode",
+        choices=QUERY_MODES,
+        nargs="+",
+        default=["text"],
+        help="Free-text and/or structured queries (default: text)",
+    )
+    parser.add_argument(
+        "--url", default=SEARCH_URL, help=f"Search endpoint (default: {SEARCH_URL})"
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Let an AdaptiveLimiter pick the requests in flight, up to --workers",
+    )
+    parser.add_argument(
+        "--check-limit",
+        action="store_true",
+        help="Fail unless the adaptive limit settles near the stand-in's "
+        "--max-concurrency (with --mock and --adaptive)",
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help="Also report peak traced memory"
+    )
+    parser.add_argument("--output", "-o", help="Write results to this JSON file")
+    parser.add_argument(
+        "--mock",
+        action="store_true",
+        help="Run against the stand-in server instead of --url, configured below",
+    )
+    add_mock_arguments(parser.add_argument_group("stand-in server (with --mock)"))
+    args = parser.parse_args()
+    if args.check_limit and not (args.mock and args.adaptive and args.max_concurrency):
+        parser.error("--check-limit needs --mock, --adaptive and --max-concurrency")
+
+    server = None
+    base_url = args.url
+    if args.mock:
+        server = serve_in_background(mock_from_args(args))
+        base_url = f"http://127.0.0.1:{server.server_port}/search"
+
+    try:
+        results = []
+        for query_mode in args.query_mode:
+            if args.input:
+                addresses = load_addresses(args.input, query_mode, args.rows)
+            else:
+                addresses = list(generate_addresses(args.rows, args.seed, query_mode))
+            for workers in args.workers:
+                for engine in args.engine:
+                    results.append(
+                        bench_engine(
+                            engine,
+                            addresses,
+                            workers,
+                            base_url,
+                            args.memory,
+                            args.adaptive,
+                        )
+                    )
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    print_report(results)
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nResults saved to {output}")
+
+    if args.check_limit:
+        failures = check_limits(results, args.max_concurrency)
+        for failure in failures:
+            print(f"Limit check failed: {failure}")
+        if failures:
+            sys.exit(1)
+        print(f"Limit check passed: settled near {args.max_concurrency} in flight")
+
+
+if __name__ == "__main__":
+    main()
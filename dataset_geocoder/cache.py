@@ -0,0 +1,252 @@
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import NamedTuple
+
+SCRIPT_DIR = Path(__file__).parent
+DEFAULT_CACHE_PATH = SCRIPT_DIR / "../data/cache/geocode_cache.sqlite3"
+
+# Geocodes are re-queried after this long, in case OSM data was corrected
+DEFAULT_TTL = 90 * 24 * 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocode (
+    query TEXT NOT NULL,
+    viewbox TEXT NOT NULL,
+    data_version TEXT NOT NULL,
+    latitude TEXT,
+    longitude TEXT,
+    display_name TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (query, viewbox, data_version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS geocode_created_at ON geocode (created_at);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form of a query for cache keys: single spaces, upper case."""
+    return " ".join(query.split()).upper()
+
+
+class GeocodeCache:
+    """
+    Persistent geocode cache in a SQLite database (WAL mode).
+
+    Entries are keyed on the normalized query, the viewbox it was bounded to
+    and the Nominatim data version, so a re-imported OSM extract never serves
+    stale results. The database can be shared by concurrent threads (each
+    gets its own connection) and processes. Empty results are cached like
+    any other; failed requests must simply not be stored.
+
+    Entries older than `ttl` seconds are ignored and removed by `prune()`,
+    which also evicts the oldest entries beyond `max_entries`.
+
+    `data_version` may be a function that reads the live version (returning
+    None when it cannot). Lookups then use the version stored by the last
+    run, and the function is only called at the first miss, so a fully
+    cached run makes no request. If the live version differs, later lookups
+    and puts use it; if it cannot be read, the stored version is kept.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_CACHE_PATH,
+        data_version: str | Callable[[], str | None] = "",
+        ttl: float | None = DEFAULT_TTL,
+        max_entries: int | None = None,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._local = threading.local()
+        self._connections: list[tuple[threading.Thread, sqlite3.Connection]] = []
+        self._lock = threading.Lock()
+        self._version_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+        self._read_version: Callable[[], str | None] | None = None
+        if callable(data_version):
+            self._read_version = data_version
+            self.data_version = self.stored_data_version() or ""
+        else:
+            self.data_version = data_version
+            self._store_data_version()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only this thread uses the connection; close() may run elsewhere
+            conn = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                # Each geocode_bulk call runs on new threads; close the
+                # connections of threads that are gone
+                finished = [c for t, c in self._connections if not t.is_alive()]
+                self._connections = [
+                    (t, c) for t, c in self._connections if t.is_alive()
+                ]
+                self._connections.append((threading.current_thread(), conn))
+            for finished_conn in finished:
+                finished_conn.close()
+        return conn
+
+    def stored_data_version(self) -> str | None:
+        """The data version of the last run that used this cache, if any."""
+        row = (
+            self._connection()
+            .execute("SELECT value FROM meta WHERE name = 'data_version'")
+            .fetchone()
+        )
+        return row[0] if row is not None else None
+
+    def _store_data_version(self) -> None:
+        if self.data_version:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO meta VALUES ('data_version', ?)",
+                (self.data_version,),
+            )
+
+    def _resolve_data_version(self, looked_up: str) -> bool:
+        """
+        Read the live data version, once, at the first miss. Returns whether
+        it differs from the version `looked_up` with.
+        """
+        with self._version_lock:
+            read_version = self._read_version
+            if read_version is not None:
+                stored = self.data_version
+                live = read_version()
+                if live is None:
+                    self.data_version = stored or "unknown"
+                    if stored:
+                        print(
+                            f"Warning: using the data version of the last run, "
+                            f"{stored}; cached results may predate a re-import"
+                        )
+                else:
+                    self.data_version = live
+                    self._store_data_version()
+                    if stored and live != stored:
+                        print(
+                            f"Nominatim data version changed from {stored} to "
+                            f"{live}; the {self._hits} cache hits before this "
+                            f"were results for {stored}"
+                        )
+                self._read_version = None
+            return self.data_version != looked_up
+
+    def _select(self, query: str, viewbox: str, data_version: str) -> tuple | None:
+        oldest = time.time() - self.ttl if self.ttl is not None else 0.0
+        return (
+            self._connection()
+            .execute(
+                "SELECT latitude, longitude, display_name FROM geocode "
+                "WHERE query = ? AND viewbox = ? AND data_version = ? "
+                "AND created_at >= ?",
+                (normalize_query(query), viewbox, data_version, oldest),
+            )
+            .fetchone()
+        )
+
+    def get(self, query: str, viewbox: str) -> dict | None:
+        """Return the cached result for `query`, or None on a miss."""
+        data_version = self.data_version
+        row = self._select(query, viewbox, data_version)
+        if (
+            row is None
+            and self._read_version is not None
+            and self._resolve_data_version(data_version)
+        ):
+            row = self._select(query, viewbox, self.data_version)
+
+        with self._lock:
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+
+        latitude, longitude, display_name = row
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "display_name": display_name,
+        }
+
+    def put(self, query: str, viewbox: str, result: dict) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                normalize_query(query),
+                viewbox,
+                self.data_version,
+                result["latitude"],
+                result["longitude"],
+                result["display_name"],
+                time.time(),
+            ),
+        )
+
+    def prune(self) -> int:
+        """Delete expired entries and the oldest beyond `max_entries`."""
+        conn = self._connection()
+        deleted = 0
+        if self.ttl is not None:
+            deleted += conn.execute(
+                "DELETE FROM geocode WHERE created_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+
+        if self.max_entries is not None:
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                deleted += conn.execute(
+                    "DELETE FROM geocode WHERE (query, viewbox, data_version) IN "
+                    "(SELECT query, viewbox, data_version FROM geocode "
+                    "ORDER BY created_at LIMIT ?)",
+                    (excess,),
+                ).rowcount
+        return deleted
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        return CacheStats(hits, misses, len(self))
+
+    def __len__(self) -> int:
+        (count,) = self._connection().execute("SELECT COUNT(*) FROM geocode").fetchone()
+        return count
+
+    def close(self) -> None:
+        """Close the connections of all threads."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for _, conn in connections:
+            conn.close()
+        self._local = threading.local()
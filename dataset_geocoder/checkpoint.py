@@ -0,0 +1,102 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+CHECKPOINT_VERSION = 1
+
+# Results are flushed to the OS as they are written, which survives a crash
+# of the process; fsync, which also survives one of the machine, is batched
+FSYNC_INTERVAL = 1.0
+
+
+def checkpoint_path(output_file: str | Path) -> Path:
+    """The sidecar kept next to `output_file` while it is being geocoded."""
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.name + ".checkpoint.jsonl")
+
+
+class Checkpoint:
+    """
+    Append-only record of finished geocodes, for resuming an interrupted run.
+
+    The file is JSON lines: a header describing the run, then one
+    [key, latitude, longitude, display_name] line per finished query. Lines
+    are appended as results arrive, so a crash loses at most the line being
+    written, which is dropped when the file is read back.
+
+    A checkpoint is only reused by a run with the same header, i.e. the same
+    query mode and viewbox; otherwise it is started over.
+    """
+
+    def __init__(self, path: str | Path, header: dict[str, Any], resume: bool = False):
+        self.path = Path(path)
+        self.header = {"version": CHECKPOINT_VERSION, **header}
+        self.results: dict[str, dict] = {}
+
+        valid_bytes = self._load() if resume else 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a+b")
+        self._file.truncate(valid_bytes)
+        if not valid_bytes:
+            self._write(self.header)
+        self._synced = time.monotonic()
+
+    def _load(self) -> int:
+        """Read a previous run's results; return the bytes worth keeping."""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return 0
+
+        with f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                return 0
+            if header != self.header:
+                print(f"Ignoring checkpoint {self.path}: written by a different run")
+                return 0
+
+            valid_bytes = f.tell()
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    key, latitude, longitude, display_name = json.loads(line)
+                except ValueError:
+                    break  # torn by the interruption; everything before it is good
+                self.results[key] = {
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "display_name": display_name,
+                }
+                valid_bytes += len(line)
+        return valid_bytes
+
+    def get(self, key: str) -> dict | None:
+        """Return the result recorded for `key`, or None if it is not done."""
+        return self.results.get(key)
+
+    def put(self, key: str, result: dict) -> None:
+        self._write(
+            [key, result["latitude"], result["longitude"], result["display_name"]]
+        )
+        if time.monotonic() - self._synced >= FSYNC_INTERVAL:
+            os.fsync(self._file.fileno())
+            self._synced = time.monotonic()
+
+    def _write(self, data: Any) -> None:
+        self._file.write(json.dumps(data).encode() + b"\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def remove(self) -> None:
+        """Close and delete the checkpoint, once the output is written."""
+        self.close()
+        self.path.unlink(missing_ok=True)
@@ -1,8 +1,20 @@
 #!/usr/bin/env python3
 import argparse
+import json
+from functools import partial
+from pathlib import Path
 
-from .geocoder import geocode_csv
-from .zipcoder import zipcode_csv
+from .cache import DEFAULT_CACHE_PATH, DEFAULT_TTL, GeocodeCache
+from .geocoder import (
+    DEFAULT_WORKERS,
+    ENGINES,
+    QUERY_MODES,
+    geocode_csv,
+    nominatim_data_version,
+)
+from .limiter import AdaptiveLimiter
+from .metrics import GeocodeMetrics, serve_metrics
+from .zipcoder import add_zcta_zip
 
 
 def main():
@@ -11,10 +23,129 @@ def main():
     parser.add_argument(
         "--output", "-o", help="Output CSV file (default: overwrite input)"
     )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Concurrent requests to Nominatim, or the most with --adaptive "
+        f"(default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Raise concurrent requests while Nominatim's latency stays flat and "
+        "cut back on errors or rising latency, up to --workers",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="threads",
+        help="Send requests from a thread pool or a single asyncio event loop "
+        "(default: threads)",
+    )
+    parser.add_argument(
+        "--query-mode",
+        choices=QUERY_MODES,
+        default="text",
+        help="Send each address as one free-text query, or as street/city/state/"
+        "postalcode fields with a free-text fallback (default: text)",
+    )
+    parser.add_argument(
+        "--cache",
+        default=str(DEFAULT_CACHE_PATH),
+        help="SQLite file of geocode results reused across runs "
+        "(default: data/cache/geocode_cache.sqlite3)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Do not read or write the cache"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_TTL / 86400,
+        help=f"Re-query cached results older than this many days "
+        f"(default: {DEFAULT_TTL // 86400})",
+    )
+    parser.add_argument(
+        "--data-version",
+        help="Nominatim data version used in cache keys (default: read from the "
+        "server's /status at the first cache miss)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="Read, geocode and write this many rows at a time, to bound memory "
+        "on large files (default: the whole file at once)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the addresses already geocoded by an interrupted run, "
+        "as recorded in <output>.checkpoint.jsonl",
+    )
+    parser.add_argument(
+        "--metrics",
+        help="Write search, cache and stage metrics to this file at the end: "
+        "Prometheus text if it ends in .prom, otherwise JSON",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve the metrics while running, at /metrics (Prometheus) "
+        "and /metrics.json",
+    )
     args = parser.parse_args()
 
-    geocode_csv(input_file=args.input, output_file=args.output)
-    zipcode_csv(input_file=args.input, output_file=args.output)
+    cache = None
+    if not args.no_cache:
+        cache = GeocodeCache(
+            args.cache,
+            # Read from /status only if some address is not cached
+            data_version=args.data_version or nominatim_data_version,
+            ttl=args.cache_ttl * 86400,
+        )
+
+    limiter = AdaptiveLimiter(args.workers) if args.adaptive else None
+    metrics = GeocodeMetrics(limiter=limiter)
+    server = None
+    if args.metrics_port is not None:
+        server = serve_metrics(metrics, port=args.metrics_port)
+        print(f"Serving metrics on http://127.0.0.1:{server.server_port}/metrics")
+
+    try:
+        geocode_csv(
+            input_file=args.input,
+            output_file=args.output,
+            max_workers=args.workers,
+            cache=cache,
+            engine=args.engine,
+            query_mode=args.query_mode,
+            checkpoint=True,
+            resume=args.resume,
+            chunk_size=args.chunk_size,
+            limiter=limiter,
+            metrics=metrics,
+            # ZIPs are assigned to each frame as it is geocoded, so the CSV
+            # is read and written once
+            stages=[partial(add_zcta_zip, metrics=metrics)],
+        )
+    finally:
+        if cache is not None:
+            cache.prune()
+            cache.close()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    if args.metrics:
+        output = Path(args.metrics)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        if output.suffix == ".prom":
+            output.write_text(metrics.to_prometheus())
+        else:
+            output.write_text(json.dumps(metrics.to_json(), indent=2) + "\n")
+        print(f"Metrics saved to {output}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import pandas as pd
+
+# Every column is read as the text in the file, empty cells as "", and
+# written back unchanged. Types are never inferred, so reading a chunk at a
+# time gives the same output as reading the whole file, and codes such as
+# zip "01602" or street number "12" keep their exact spelling. Unlike the
+# old whole-file read, other columns are not turned into numbers or NaN
+# either (no "7.0" for 7, "7" for "007", or blank for "NA").
+READ_OPTIONS = {"dtype": str, "keep_default_na": False}
+
+
+def read_frames(
+    input_file: str, chunk_size: int | None = None
+) -> Iterator[pd.DataFrame]:
+    """Yield the whole CSV as one DataFrame, or `chunk_size` rows at a time."""
+    if chunk_size is None:
+        yield pd.read_csv(input_file, **READ_OPTIONS)
+        return
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+
+    with pd.read_csv(input_file, chunksize=chunk_size, **READ_OPTIONS) as reader:
+        yield from reader
+
+
+def write_frames(frames: Iterable[pd.DataFrame], output_file: str) -> None:
+    """
+    Write `frames` one after another as a single CSV.
+
+    They go to a temporary file that replaces `output_file` once all are
+    written, so an interruption never leaves a half-written output, and the
+    output may be the file the frames are read from.
+    """
+    partial = Path(f"{output_file}.partial")
+    try:
+        for i, df in enumerate(frames):
+            df.to_csv(partial, index=False, mode="a" if i else "w", header=not i)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    os.replace(partial, output_file)
@@ -1,113 +1,379 @@
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from functools import lru_cache
-from typing import Protocol, TypedDict
+from types import TracebackType
+from typing import NamedTuple, NotRequired, Protocol, Self, TypedDict
 
 import pandas as pd
 import requests
 from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.connectionpool import ConnectionPool
+from urllib3.response import BaseHTTPResponse
 from urllib3.util.retry import Retry
 
-# Global session (shared across threads)
-_session = None
-
-
-def get_session():
-    global _session
-
-    if _session is None:
+from .cache import GeocodeCache
+from .checkpoint import Checkpoint, checkpoint_path
+from .csv_io import read_frames, write_frames
+from .limiter import AdaptiveLimiter
+from .metrics import EMPTY, FOUND, GeocodeMetrics, failure_kind
+
+NOMINATIM_URL = "http://localhost:8080"
+SEARCH_URL = f"{NOMINATIM_URL}/search"
+
+# Only look for addresses in Worcester, MA
+MIN_LON, MIN_LAT, MAX_LON, MAX_LAT = -71.884043, 42.210053, -71.731237, 42.341187
+
+# Nominatim bounding box (lon1, lat1, lon2, lat2)
+VIEWBOX = f"{MIN_LON},{MAX_LAT},{MAX_LON},{MIN_LAT}"  # note: top-left, bottom-right
+
+# Concurrent requests sent to the local Nominatim. Each search is one
+# database query, so throughput levels off once the server's cores are busy;
+# a second request per core hides the HTTP round trip.
+DEFAULT_WORKERS = min(32, 2 * (os.cpu_count() or 1))
+
+# "threads": geocode_bulk, one pooled thread per concurrent request
+# "async": async_geocoder.geocode_stream, one event loop for all requests
+ENGINES = ("threads", "async")
+
+# Responses retried by the session, as signs of an overloaded server
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# One session per thread: requests.Session is not safe to share between threads
+_local = threading.local()
+
+
+class ObservedRetry(Retry):
+    """
+    Retry that tells the request in progress on this thread (see _search)
+    about each retry when it happens, instead of after the backoff, so the
+    limiter can cut back before more requests pile on.
+    """
+
+    def increment(
+        self,
+        method: str | None = None,
+        url: str | None = None,
+        response: BaseHTTPResponse | None = None,
+        error: Exception | None = None,
+        _pool: ConnectionPool | None = None,
+        _stacktrace: TracebackType | None = None,
+    ) -> Self:
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        # Not reached when retries have run out
+        on_retry = getattr(_local, "on_retry", None)
+        if on_retry is not None:
+            on_retry()
+        return retry
+
+
+def get_session() -> requests.Session:
+    """Return this thread's session, creating it on first use."""
+    session = getattr(_local, "session", None)
+
+    if session is None:
         session = requests.Session()
 
-        retries = Retry(
+        retries = ObservedRetry(
             total=3,
             backoff_factor=0.5,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=RETRY_STATUSES,
             allowed_methods=["GET"],
+            # Once retries run out, return the last error response, so the
+            # failure is reported with its status
+            raise_on_status=False,
         )
 
+        # A thread sends one request at a time, so it needs one connection
         adapter = HTTPAdapter(
             max_retries=retries,
-            pool_connections=50,
-            pool_maxsize=50,
+            pool_connections=1,
+            pool_maxsize=1,
         )
 
         session.mount("http://", adapter)
         session.mount("https://", adapter)
 
-        _session = session
+        _local.session = session
+
+    return session
+
+
+class GeocodeResult(TypedDict):
+    latitude: float | None
+    longitude: float | None
+    display_name: str | None
+    # Set when the request failed, as opposed to finding nothing
+    error: NotRequired[str]
+
+
+def _empty_result() -> GeocodeResult:
+    return {"latitude": None, "longitude": None, "display_name": None}
+
+
+def _failed_result(error: BaseException) -> GeocodeResult:
+    result = _empty_result()
+    result["error"] = str(error) or type(error).__name__
+    return result
+
+
+class SearchError(Exception):
+    """
+    A failed search, with the seconds spent on it: like a successful one's,
+    from when the request was sent, not counting the wait for a slot.
+    """
+
+    def __init__(self, error: Exception, seconds: float):
+        super().__init__(str(error))
+        self.error = error
+        self.seconds = seconds
+
+
+def nominatim_data_version(base_url: str = NOMINATIM_URL) -> str | None:
+    """
+    Return the timestamp of the data loaded into Nominatim, from /status.
+
+    Cached geocodes are keyed on it, so results from an older OSM import are
+    never reused. Returns None if the status cannot be read.
+    """
+    try:
+        r = get_session().get(
+            f"{base_url}/status", params={"format": "json"}, timeout=(3, 15)
+        )
+        r.raise_for_status()
+        return r.json().get("data_updated") or None
+    except Exception as e:
+        print(f"Could not read Nominatim data version from {base_url}/status: {e}")
+        return None
 
-    return _session
 
+HEADERS = {
+    "User-Agent": "local-geocoder/1.0",
+}
 
-@lru_cache(maxsize=100_000)
-def geocode(address: str, base_url="http://localhost:8080/search") -> dict:
-    if not address.strip():
-        return {"latitude": None, "longitude": None, "display_name": None}
+# "text": one free-text q= per address, as built by build_address
+# "structured": street/city/state/postalcode from the normalized columns,
+#   falling back to free text when the structured search finds nothing
+QUERY_MODES = ("text", "structured")
 
-    # Only look for addresses in Worcester, MA
-    min_lon, min_lat, max_lon, max_lat = -71.884043, 42.210053, -71.731237, 42.341187
 
-    params = {
-        "q": address.strip(),
+class StructuredQuery(NamedTuple):
+    """Address fields for a Nominatim structured search."""
+
+    street: str  # house number and street name
+    city: str = ""
+    state: str = ""
+    postalcode: str = ""
+
+    def text(self) -> str:
+        """The same address as one free-text query."""
+        return " ".join(part for part in self if part)
+
+
+# A free-text address or the fields of a structured search
+Query = str | StructuredQuery
+
+
+def query_text(query: Query) -> str:
+    return query.text() if isinstance(query, StructuredQuery) else query
+
+
+def _search_params(query: Query) -> dict[str, str | int]:
+    if isinstance(query, StructuredQuery):
+        params: dict[str, str | int] = {
+            field: value for field, value in query._asdict().items() if value
+        }
+    else:
+        params = {"q": query.strip()}
+
+    return {
+        **params,
         "format": "json",
         "limit": 1,
-        # Nominatim bounding box (lon1, lat1, lon2, lat2)
-        "viewbox": f"{min_lon},{max_lat},{max_lon},{min_lat}",  # note: top-left, bottom-right
+        "viewbox": VIEWBOX,
         "bounded": 1,  # restrict results strictly to the viewbox
     }
 
-    headers = {
-        "User-Agent": "local-geocoder/1.0",
+
+def _search_plan(query: Query) -> list[tuple[str, Query]]:
+    """
+    The searches to make for `query`, in order, each with the mode it is
+    recorded under. The first one that finds the address wins.
+    """
+    if not isinstance(query, StructuredQuery):
+        return [("text", query)]
+    if not query.street:
+        # Structured search needs a street; free text may still place the rest
+        return [("text", query.text())]
+    return [("structured", query), ("fallback", query.text())]
+
+
+def _parse_search(data: list[dict]) -> GeocodeResult:
+    """Turn a Nominatim /search response into a GeocodeResult."""
+    if not data:
+        return _empty_result()
+
+    result = data[0]
+
+    return {
+        "latitude": result.get("lat"),
+        "longitude": result.get("lon"),
+        "display_name": result.get("display_name"),
     }
 
+
+def _search(
+    query: Query,
+    base_url: str = SEARCH_URL,
+    limiter: AdaptiveLimiter | None = None,
+    metrics: GeocodeMetrics | None = None,
+) -> tuple[GeocodeResult, float]:
+    """
+    Query Nominatim once. Raises SearchError on any request failure.
+
+    Also returns the seconds spent on the request and its retries, not
+    counting time spent waiting for `limiter`.
+    """
     session = get_session()
 
+    if limiter is not None:
+        limiter.acquire()
+    started = time.perf_counter()
+
+    def on_retry() -> None:
+        if limiter is not None:
+            limiter.report_overload(started)
+        if metrics is not None:
+            metrics.record_retry()
+
+    _local.on_retry = on_retry
     try:
-        r = session.get(
-            base_url,
-            params=params,
-            headers=headers,
-            timeout=(3, 15),  # connect, read
-        )
+        try:
+            r = session.get(
+                base_url,
+                params=_search_params(query),
+                headers=HEADERS,
+                timeout=(3, 15),  # connect, read
+            )
+        except BaseException:
+            if limiter is not None:
+                limiter.release(started, overloaded=True)
+            raise
+        finally:
+            _local.on_retry = None
+        seconds = time.perf_counter() - started
+
+        if limiter is not None:
+            # A retried request means the server was overloaded, even if the
+            # retry went through
+            retries = getattr(r.raw, "retries", None)
+            limiter.release(
+                started,
+                overloaded=r.status_code in RETRY_STATUSES
+                or bool(retries and retries.history),
+            )
 
         r.raise_for_status()
 
-        data = r.json()
-
-        if not data:
-            return {"latitude": None, "longitude": None, "display_name": None}
+        return _parse_search(r.json()), seconds
+    except Exception as e:
+        raise SearchError(e, time.perf_counter() - started) from e
 
-        result = data[0]
 
-        return {
-            "latitude": result.get("lat"),
-            "longitude": result.get("lon"),
-            "display_name": result.get("display_name"),
-        }
+def _cache_key(query: Query) -> str:
+    if isinstance(query, StructuredQuery):
+        return ";".join(f"{field}={value}" for field, value in query._asdict().items())
+    return query
 
-    except Exception as e:
-        print(f"Geocode failed: {address} -> {e}")
 
-        return {
-            "latitude": None,
-            "longitude": None,
-            "display_name": None,
-        }
+def _cache_get(
+    query: Query, cache: GeocodeCache | None, metrics: GeocodeMetrics | None = None
+) -> GeocodeResult | None:
+    if cache is None:
+        return None
+    cached = cache.get(_cache_key(query), VIEWBOX)
+    if metrics is not None:
+        metrics.record_cache(cached is not None)
+    return cached  # type: ignore[return-value]
 
 
-class GeocodeResult(TypedDict):
-    latitude: float | None
-    longitude: float | None
-    display_name: str | None
+def _cache_put(query: Query, result: GeocodeResult, cache: GeocodeCache | None):
+    if cache is None:
+        return
+    try:
+        cache.put(_cache_key(query), VIEWBOX, dict(result))
+    except sqlite3.Error as e:
+        print(f"Could not cache geocode for {query_text(query)}: {e}")
+
+
+def geocode(
+    query: Query,
+    base_url: str = SEARCH_URL,
+    cache: GeocodeCache | None = None,
+    metrics: GeocodeMetrics | None = None,
+    limiter: AdaptiveLimiter | None = None,
+) -> GeocodeResult:
+    """
+    Geocode one free-text address or structured query, consulting `cache`
+    first when given.
+
+    Found and not-found results are both stored in the cache; failed requests
+    are not, so they are retried on the next run. A failed request gives an
+    empty result with an `error` message.
+    """
+    if not query_text(query).strip():
+        return _empty_result()
+
+    cached = _cache_get(query, cache, metrics)
+    if cached is not None:
+        return cached
+
+    for mode, search in _search_plan(query):
+        try:
+            result, seconds = _search(search, base_url, limiter, metrics)
+        except SearchError as e:
+            if metrics is not None:
+                metrics.record(mode, e.seconds, failure_kind(e.error))
+            print(f"Geocode failed: {query_text(query)} -> {e.error}")
+
+            return _failed_result(e.error)
+
+        found = result["latitude"] is not None
+        if metrics is not None:
+            metrics.record(mode, seconds, FOUND if found else EMPTY)
+        if found:
+            break
+
+    _cache_put(query, result, cache)
+
+    return result
 
 
 # -------------------- Bulk geocoder --------------------
 def geocode_bulk(
-    addresses: list[str],
+    addresses: Sequence[Query],
     max_workers: int | None = None,
+    cache: GeocodeCache | None = None,
+    base_url: str = SEARCH_URL,
+    metrics: GeocodeMetrics | None = None,
+    on_result: Callable[[int, GeocodeResult], None] | None = None,
+    limiter: AdaptiveLimiter | None = None,
 ) -> list[GeocodeResult]:
+    """
+    Geocode `addresses` on a pool of `max_workers` threads and return the
+    results in input order. With a `limiter`, the threads only send as many
+    requests at once as it allows, up to `max_workers`.
+
+    `on_result(index, result)` is called in the calling thread as each
+    result comes in, in completion order.
+    """
     if max_workers is None:
-        max_workers = 1  # TODO: Investigate concurrency issue
+        max_workers = DEFAULT_WORKERS
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1, got {max_workers}")
 
     results: list[GeocodeResult] = [
         {
@@ -118,9 +384,11 @@ def geocode_bulk(
         for _ in addresses
     ]
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
         future_map = {
-            executor.submit(geocode, addr): i for i, addr in enumerate(addresses)
+            executor.submit(geocode, addr, base_url, cache, metrics, limiter): i
+            for i, addr in enumerate(addresses)
         }
 
         for future in tqdm(
@@ -131,12 +399,13 @@ def geocode_bulk(
             idx = future_map[future]
             try:
                 results[idx] = future.result()
-            except Exception:
-                results[idx] = {
-                    "latitude": None,
-                    "longitude": None,
-                    "display_name": None,
-                }
+            except Exception as e:
+                results[idx] = _failed_result(e)
+            if on_result is not None:
+                on_result(idx, results[idx])
+    finally:
+        # On an interruption, drop the queued addresses instead of finishing them
+        executor.shutdown(cancel_futures=True)
 
     return results
 
@@ -145,6 +414,14 @@ class AddressBuilder(Protocol):
     def __call__(self, row) -> str: ...
 
 
+class QueryBuilder(Protocol):
+    def __call__(self, row) -> StructuredQuery: ...
+
+
+class FrameStage(Protocol):
+    def __call__(self, df: pd.DataFrame) -> pd.DataFrame: ...
+
+
 def _safe(val) -> str:
     """Convert NaN/None to empty string, else to stripped string."""
     if pd.isna(val):
@@ -171,32 +448,185 @@ def build_address(row) -> str:
     return " ".join(p for p in parts if p)
 
 
+def build_query(row) -> StructuredQuery:
+    street = [
+        _safe(row.street_number),
+        _safe(row.street_name),
+        _safe(row.street_type),
+    ]
+    return StructuredQuery(
+        street=" ".join(p for p in street if p),
+        city=_safe(row.city),
+        state=_safe(row.state),
+        postalcode=_safe(row.zip_code),
+    )
+
+
 # -------------------- Main geocode_csv using bulk --------------------
+def _geocode_frame(
+    df: pd.DataFrame,
+    builder: AddressBuilder | QueryBuilder,
+    engine: str,
+    max_workers: int | None,
+    cache: GeocodeCache | None,
+    sidecar: Checkpoint | None,
+    metrics: GeocodeMetrics,
+    limiter: AdaptiveLimiter | None,
+) -> pd.DataFrame:
+    """Add the geocode columns to `df`, one whole input or one chunk of it."""
+    # Build all addresses first
+    addresses: list[Query] = [builder(row) for row in df.itertuples(index=False)]
+
+    # Geocode each distinct address once; permits and licenses repeat a lot
+    unique = list(dict.fromkeys(addresses))
+
+    done: dict[Query, GeocodeResult] = {}
+    if sidecar is not None:
+        for address in unique:
+            result = sidecar.get(_cache_key(address))
+            if result is not None:
+                done[address] = result  # type: ignore[assignment]
+    pending = [address for address in unique if address not in done]
+
+    print(
+        f"Geocoding {len(unique)} unique addresses "
+        f"({len(addresses)} rows, {len(addresses) - len(unique)} duplicates"
+        + (f", {len(done)} already geocoded)" if done else ")")
+    )
+
+    def record(index: int, result: GeocodeResult) -> None:
+        # Failed requests are left out, so a resumed run retries them
+        if sidecar is not None and "error" not in result:
+            sidecar.put(_cache_key(pending[index]), dict(result))
+
+    # Bulk geocode
+    if engine == "async":
+        from .async_geocoder import geocode_stream
+
+        results: list[GeocodeResult] = []
+        stream = geocode_stream(
+            pending, max_workers, cache=cache, metrics=metrics, limiter=limiter
+        )
+        for result in tqdm(stream, total=len(pending), desc="Geocoding (async)"):
+            record(len(results), result)
+            results.append(result)
+    else:
+        results = geocode_bulk(
+            pending,
+            max_workers=max_workers,
+            cache=cache,
+            metrics=metrics,
+            on_result=record,
+            limiter=limiter,
+        )
+
+    # Assign results back to DataFrame, broadcasting them to duplicate rows
+    by_address = done | dict(zip(pending, results, strict=True))
+    results = [by_address[address] for address in addresses]
+    df["latitude"] = [res["latitude"] for res in results]
+    df["longitude"] = [res["longitude"] for res in results]
+    df["display_name"] = [res["display_name"] for res in results]
+    return df
+
+
 def geocode_csv(
     input_file: str,
     build_address: AddressBuilder = build_address,
     output_file: str | None = None,
     max_workers: int | None = None,
+    cache: GeocodeCache | None = None,
+    engine: str = "threads",
+    query_mode: str = "text",
+    build_query: QueryBuilder = build_query,
+    checkpoint: bool = False,
+    resume: bool = False,
+    chunk_size: int | None = None,
+    limiter: AdaptiveLimiter | None = None,
+    metrics: GeocodeMetrics | None = None,
+    stages: Sequence[FrameStage] = (),
 ) -> None:
+    """
+    Add latitude, longitude and display_name columns to `input_file`.
+
+    Each of `stages` is then applied, in order, to every geocoded frame
+    before it is written, e.g. zipcoder.add_zcta_zip. The input is read and
+    the output written once, however many stages follow the geocoding.
+
+    With `chunk_size`, the input is read, geocoded and appended to the
+    output that many rows at a time, so memory no longer grows with the
+    file; addresses are then deduplicated within each chunk, and the cache
+    catches repeats across chunks. The output is the same either way.
+
+    With `checkpoint`, each finished address is also appended to a sidecar
+    next to the output (see checkpoint_path), which is deleted once the
+    output is written. If the run is interrupted, calling again with
+    `resume` only geocodes the addresses the sidecar does not have, and
+    writes the same output an uninterrupted run would have.
+
+    With a `limiter`, `max_workers` is only the most requests in flight; the
+    limiter adjusts the actual number to the server's latency and errors.
+
+    Search, cache and stage metrics are recorded in `metrics`, if given, and
+    summarized at the end.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+    if query_mode not in QUERY_MODES:
+        raise ValueError(f"query_mode must be one of {QUERY_MODES}, got {query_mode!r}")
 
     if output_file is None:
         output_file = input_file
 
-    df = pd.read_csv(
-        input_file,
-        dtype={"street_number": str, "street_range_to": str, "zip_code": str},
-    )
-
-    # Build all addresses first
-    addresses = [build_address(row) for row in df.itertuples(index=False)]
-
-    # Bulk geocode
-    results = geocode_bulk(addresses, max_workers=max_workers)
+    sidecar = None
+    if checkpoint or resume:
+        sidecar = Checkpoint(
+            checkpoint_path(output_file),
+            {"query_mode": query_mode, "viewbox": VIEWBOX},
+            resume=resume,
+        )
+        if resume:
+            print(
+                f"Resuming from {sidecar.path}: "
+                f"{len(sidecar.results)} addresses already geocoded"
+            )
+
+    builder = build_query if query_mode == "structured" else build_address
+    if metrics is None:
+        metrics = GeocodeMetrics(limiter=limiter)
+
+    def geocoded_frames() -> Iterator[pd.DataFrame]:
+        for df in read_frames(input_file, chunk_size):
+            with metrics.stage("geocode", len(df)):
+                df = _geocode_frame(
+                    df,
+                    builder,
+                    engine,
+                    max_workers,
+                    cache,
+                    sidecar,
+                    metrics,
+                    limiter,
+                )
+            for stage in stages:
+                df = stage(df)
+            yield df
 
-    # Assign results back to DataFrame
-    df["latitude"] = [res["latitude"] for res in results]
-    df["longitude"] = [res["longitude"] for res in results]
-    df["display_name"] = [res["display_name"] for res in results]
+    try:
+        write_frames(geocoded_frames(), output_file)
+    finally:
+        if sidecar is not None:
+            sidecar.close()
+    if sidecar is not None:
+        sidecar.remove()
 
-    df.to_csv(output_file, index=False)
     print(f"Geocoding complete. Output saved to: {output_file}")
+    for line in metrics.report():
+        print(line)
+    if limiter is not None:
+        print(limiter.report())
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"Geocode cache: {stats.hits} hits, {stats.misses} misses "
+            f"({stats.hit_rate:.1%} hit rate), {stats.entries} entries in {cache.path}"
+        )
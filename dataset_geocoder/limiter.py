@@ -0,0 +1,269 @@
+"""
+Adaptive limit on the requests in flight to Nominatim.
+
+How many concurrent searches the local Nominatim can take depends on how the
+container is sized and what else it is doing, so a fixed --workers either
+leaves it idle or floods it into 429s and 5xx. AdaptiveLimiter finds the
+level as it goes (additive increase, multiplicative decrease): it raises the
+limit while latency stays flat and cuts it back when requests fail, are
+retried, or start to queue.
+
+    limiter = AdaptiveLimiter(max_limit=64)
+    geocode_bulk(addresses, max_workers=64, limiter=limiter)
+    print(limiter.report())
+"""
+
+import math
+import statistics
+import threading
+import time
+from typing import Any
+
+DEFAULT_INITIAL_LIMIT = 4
+
+# Latency above this multiple of the latency without queueing means
+# requests are queueing in the server rather than being worked on
+DEFAULT_TOLERANCE = 1.5
+
+# Share of the limit kept on each decrease
+DEFAULT_BACKOFF = 0.75
+
+# Weight of each new sample in the smoothed latency
+SMOOTHING = 0.1
+
+# At the start and then every PROBE_INTERVAL seconds, the limit drops to
+# min_limit until PROBE_SAMPLES requests sent in that time are back, and the
+# latency without queueing is measured again from them. Nothing else can
+# raise it, so it follows a server that got slower without ever taking in a
+# queue the limit itself built.
+PROBE_INTERVAL = 10.0
+PROBE_SAMPLES = 5
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on concurrent requests, driven by latency and failures.
+
+    Each finished request reports when it was sent and whether it failed or
+    had to be retried. While the smoothed latency stays within `tolerance`
+    times the server's latency without queueing and the limit is in use,
+    the limit grows by about one per limit's worth of requests, i.e. once
+    per round trip. A failure or latency beyond that bound multiplies it by
+    `backoff`. Like TCP, only requests sent after the last decrease can
+    cause another, so a burst of errors, or retries reporting back after
+    their backoff, counts once.
+
+    The latency without queueing is measured by probes that briefly hold the
+    limit at min_limit (see PROBE_INTERVAL), never taken from requests sent
+    under a higher limit, which may have queued.
+
+    Thread-safe. Threads block in acquire(); an event loop calls
+    try_acquire() and waits for releases itself.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial: int = DEFAULT_INITIAL_LIMIT,
+        tolerance: float = DEFAULT_TOLERANCE,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        if min_limit < 1:
+            raise ValueError(f"min_limit must be at least 1, got {min_limit}")
+        if max_limit < min_limit:
+            raise ValueError(
+                f"max_limit must be at least min_limit ({min_limit}), got {max_limit}"
+            )
+        if tolerance <= 1:
+            raise ValueError(f"tolerance must be above 1, got {tolerance}")
+        if not 0 < backoff < 1:
+            raise ValueError(f"backoff must be between 0 and 1, got {backoff}")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._latency: float | None = None
+        self._min_latency = math.inf
+        self._last_decrease = -math.inf
+        self._last_probe = time.perf_counter()
+        self._probe_started: float | None = None
+        self._probe_samples: list[float] = []
+        self._probes = 0
+        self._peak_limit = int(self._limit)
+        self._created = self._limit_changed = time.perf_counter()
+        self._limit_seconds = 0.0
+        self._increases = 0
+        self._decreases = 0
+        self._changed = threading.Condition()
+
+        # Measure the server before sending it more than min_limit at once
+        self._start_probe()
+
+    @property
+    def limit(self) -> int:
+        """Requests currently allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def latency(self) -> float | None:
+        """Smoothed latency of successful requests, in seconds."""
+        return self._latency
+
+    @property
+    def min_latency(self) -> float | None:
+        """The server's latency without queueing, as last measured."""
+        return self._min_latency if self._min_latency < math.inf else None
+
+    @property
+    def probing(self) -> bool:
+        """Whether the limit is held at min_limit to measure the latency."""
+        return self._probe_started is not None
+
+    def _free(self) -> bool:
+        allowed = self.min_limit if self.probing else int(self._limit)
+        return self._in_flight < allowed
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free under the current limit."""
+        with self._changed:
+            if not self._free():
+                return False
+            self._in_flight += 1
+            return True
+
+    def acquire(self) -> None:
+        """Wait for a slot under the current limit and take it."""
+        with self._changed:
+            self._changed.wait_for(self._free)
+            self._in_flight += 1
+
+    def report_overload(self, started: float) -> None:
+        """
+        Signal that the request sent at `started` is being retried, as soon
+        as it happens rather than once the retries are done.
+        """
+        with self._changed:
+            self._decrease(started)
+
+    def release(self, started: float, overloaded: bool = False) -> None:
+        """
+        Give back a slot, for a request sent at `started` (time.perf_counter())
+        that is done now. `overloaded` if it failed or had to be retried.
+        """
+        with self._changed:
+            busy = self._in_flight * 2 >= self._limit
+            self._in_flight -= 1
+            seconds = time.perf_counter() - started
+            if overloaded:
+                self._decrease(started)
+            elif self.probing:
+                self._probe(started, seconds)
+            else:
+                latency = self._sample(seconds)
+                if latency > self.tolerance * self._min_latency:
+                    self._decrease(started)
+                elif busy:
+                    # Only grow a limit that is in use; an idle one says
+                    # nothing about the server
+                    self._increase()
+                if time.perf_counter() - self._last_probe >= PROBE_INTERVAL:
+                    self._start_probe()
+            self._changed.notify_all()
+
+    def _sample(self, seconds: float) -> float:
+        """Fold `seconds` into the smoothed latency and return it."""
+        assert self._latency is not None  # seeded by the first probe
+        latency = self._latency + SMOOTHING * (seconds - self._latency)
+        self._latency = latency
+        return latency
+
+    def _start_probe(self) -> None:
+        self._probe_started = time.perf_counter()
+        self._probe_samples = []
+
+    def _probe(self, started: float, seconds: float) -> None:
+        """Count a request toward the probe in progress; end it once enough are back."""
+        assert self._probe_started is not None
+        if started < self._probe_started:
+            return  # sent before the probe, under the full limit
+
+        self._probe_samples.append(seconds)
+        if len(self._probe_samples) >= PROBE_SAMPLES:
+            # The median of single requests, so neither one that set up the
+            # connection nor one unusually fast query sets the level
+            self._min_latency = statistics.median(self._probe_samples)
+            if self._latency is None:
+                self._latency = self._min_latency
+            self._probe_started = None
+            self._probes += 1
+            self._last_probe = time.perf_counter()
+
+    def _increase(self) -> None:
+        if self._limit < self.max_limit:
+            self._set_limit(min(self.max_limit, self._limit + 1 / self._limit))
+            self._peak_limit = max(self._peak_limit, int(self._limit))
+            self._increases += 1
+
+    def _decrease(self, started: float) -> None:
+        if started < self._last_decrease:
+            return  # sent under the old limit, which was already cut
+        if self._limit > self.min_limit:
+            self._set_limit(max(self.min_limit, self._limit * self.backoff))
+            self._decreases += 1
+        self._last_decrease = time.perf_counter()
+
+    def _set_limit(self, limit: float) -> None:
+        now = time.perf_counter()
+        self._limit_seconds += int(self._limit) * (now - self._limit_changed)
+        self._limit_changed = now
+        self._limit = limit
+
+    def mean_limit(self) -> float:
+        """The limit averaged over the time since the limiter was created."""
+        with self._changed:
+            now = time.perf_counter()
+            limit_seconds = self._limit_seconds + int(self._limit) * (
+                now - self._limit_changed
+            )
+            return limit_seconds / (now - self._created) if now > self._created else 0
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._changed:
+            latency, min_latency = self._latency, self.min_latency
+            return {
+                "limit": int(self._limit),
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "peak_limit": self._peak_limit,
+                "mean_limit": round(self.mean_limit(), 2),
+                "in_flight": self._in_flight,
+                "latency_ms": round(latency * 1000, 3) if latency else None,
+                "min_latency_ms": round(min_latency * 1000, 3) if min_latency else None,
+                "probing": self.probing,
+                "increases": self._increases,
+                "decreases": self._decreases,
+                "probes": self._probes,
+            }
+
+    def report(self) -> str:
+        s = self.snapshot()
+        latency = (
+            f"latency {s['latency_ms']:.1f} ms (unqueued {s['min_latency_ms']:.1f} ms)"
+            if s["latency_ms"] is not None
+            else "no latency samples"
+        )
+        return (
+            f"Adaptive limit: {s['limit']} in flight "
+            f"(mean {s['mean_limit']:.1f}, peak {s['peak_limit']}, "
+            f"range {s['min_limit']}-{s['max_limit']}), "
+            f"{latency}, {s['decreases']} decreases"
+        )
@@ -0,0 +1,396 @@
+"""
+Metrics of a geocoding run, for capacity planning of the Nominatim box:
+
+  - searches per query mode, by outcome: "found", "empty" (Nominatim found
+    nothing), or the kind of failure (see failure_kind)
+  - a latency histogram of the searches of each mode
+  - cache hits and misses, and requests retried
+  - rows and rows per second of each stage ("geocode", "zcta")
+
+    metrics = GeocodeMetrics()
+    geocode_csv("permits.csv", metrics=metrics)
+    Path("run.prom").write_text(metrics.to_prometheus())
+
+serve_metrics() publishes them while the run is in progress, as Prometheus
+text (GET /metrics) or JSON (GET /metrics.json).
+"""
+
+import asyncio
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import requests
+import urllib3
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from .limiter import AdaptiveLimiter
+
+DEFAULT_PORT = 9108
+
+# Upper bounds, in seconds, of the search latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FOUND = "found"
+EMPTY = "empty"
+
+
+def failure_kind(error: BaseException) -> str:
+    """
+    Classify a failed search: "timeout", "http_<status>" for an error
+    response (after any retries), "invalid_response" for a body that is not
+    JSON, "connection" for other network errors, or "error".
+    """
+    # Once retries run out, requests raises ConnectionError(MaxRetryError),
+    # whatever the last attempt failed with, e.g. a read timeout
+    if isinstance(error, requests.ConnectionError) and error.args:
+        error = error.args[0]
+    if isinstance(error, MaxRetryError) and error.reason is not None:
+        error = error.reason
+
+    if isinstance(error, NewConnectionError):
+        return "connection"  # refused or unresolved: a ConnectTimeoutError too
+    if isinstance(
+        error, (requests.Timeout, TimeoutError, urllib3.exceptions.TimeoutError)
+    ):
+        return "timeout"
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return f"http_{error.response.status_code}"
+    status = getattr(error, "status", None)  # async_geocoder.HTTPStatusError
+    if isinstance(status, int):
+        return f"http_{status}"
+    if isinstance(error, ValueError):
+        return "invalid_response"
+    if isinstance(
+        error,
+        (OSError, asyncio.IncompleteReadError, urllib3.exceptions.HTTPError),
+    ):
+        return "connection"
+    return "error"
+
+
+@dataclass(slots=True)
+class ModeStats:
+    requests: int = 0
+    found: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    outcomes: dict[str, int] = field(default_factory=dict)
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    latencies: list[float] = field(default_factory=list)
+
+    @property
+    def hit_rate(self) -> float:
+        answered = self.requests - self.errors
+        return self.found / answered if answered else 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.seconds / self.requests * 1000 if self.requests else 0.0
+
+    def percentile_ms(self, q: float) -> float | None:
+        """Nearest-rank percentile of the kept latencies, if any were kept."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+        return ordered[index] * 1000
+
+
+@dataclass(slots=True)
+class StageStats:
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float | None:
+        return self.rows / self.seconds if self.seconds else None
+
+
+class GeocodeMetrics:
+    """
+    Thread-safe counters and histograms of a geocoding run.
+
+    Search modes are "text" and "structured" searches, plus "fallback" for
+    the free-text search made after a structured one found nothing.
+    `keep_latencies` also keeps every latency, for exact percentiles. With a
+    `limiter`, its current limit and latency are exported too.
+    """
+
+    def __init__(
+        self, keep_latencies: bool = False, limiter: AdaptiveLimiter | None = None
+    ) -> None:
+        self.modes: dict[str, ModeStats] = {}
+        self.stages: dict[str, StageStats] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.retries = 0
+        self.keep_latencies = keep_latencies
+        self.limiter = limiter
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, mode: str, seconds: float, outcome: str) -> None:
+        """Record one search: FOUND, EMPTY or a failure_kind()."""
+        with self._lock:
+            stats = self.modes.get(mode)
+            if stats is None:
+                stats = self.modes[mode] = ModeStats()
+            stats.requests += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            stats.outcomes[outcome] = stats.outcomes.get(outcome, 0) + 1
+            if self.keep_latencies:
+                stats.latencies.append(seconds)
+            if outcome == FOUND:
+                stats.found += 1
+            elif outcome != EMPTY:
+                stats.errors += 1
+
+    def record_cache(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    @contextmanager
+    def stage(self, name: str, rows: int) -> Iterator[None]:
+        """Time a stage processing `rows` rows (one file, or one chunk of it)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                stats = self.stages.get(name)
+                if stats is None:
+                    stats = self.stages[name] = StageStats()
+                stats.rows += rows
+                stats.seconds += seconds
+
+    def failures(self) -> dict[str, int]:
+        """Failed searches of all modes, by kind."""
+        with self._lock:
+            failures: dict[str, int] = {}
+            for stats in self.modes.values():
+                for outcome, count in stats.outcomes.items():
+                    if outcome not in (FOUND, EMPTY):
+                        failures[outcome] = failures.get(outcome, 0) + count
+            return dict(sorted(failures.items()))
+
+    def report(self) -> list[str]:
+        failures = self.failures()
+        with self._lock:
+            lines = [
+                f"Search {mode}: {s.requests} requests, {s.hit_rate:.1%} found, "
+                f"{s.errors} failed, mean {s.mean_ms:.1f} ms, "
+                f"max {s.max_seconds * 1000:.1f} ms"
+                for mode, s in self.modes.items()
+            ]
+            if failures:
+                lines.append(
+                    "Failures: " + ", ".join(f"{k} {n}" for k, n in failures.items())
+                )
+            if self.retries:
+                lines.append(f"Retries: {self.retries}")
+            lines += [
+                f"Stage {name}: {s.rows} rows in {s.seconds:.1f} s"
+                + (f" ({s.rows_per_sec:,.0f} rows/s)" if s.rows_per_sec else "")
+                for name, s in self.stages.items()
+            ]
+            return lines
+
+    def to_json(self) -> dict[str, Any]:
+        failures = self.failures()
+        with self._lock:
+            data: dict[str, Any] = {
+                "started": self.started,
+                "uptime_s": round(time.time() - self.started, 3),
+                "searches": {
+                    mode: {
+                        "requests": s.requests,
+                        "outcomes": dict(s.outcomes),
+                        "hit_rate": round(s.hit_rate, 4),
+                        "mean_ms": round(s.mean_ms, 3),
+                        "max_ms": round(s.max_seconds * 1000, 3),
+                        "latency_buckets": {
+                            **{
+                                str(bound): count
+                                for bound, count in zip(
+                                    LATENCY_BUCKETS,
+                                    _cumulative(s.buckets),
+                                    strict=False,
+                                )
+                            },
+                            "+Inf": s.requests,
+                        },
+                    }
+                    for mode, s in self.modes.items()
+                },
+                "failures": failures,
+                "cache": {"hits": self.cache_hits, "misses": self.cache_misses},
+                "retries": self.retries,
+                "stages": {
+                    name: {
+                        "rows": s.rows,
+                        "seconds": round(s.seconds, 3),
+                        "rows_per_sec": (
+                            round(s.rows_per_sec, 1) if s.rows_per_sec else None
+                        ),
+                    }
+                    for name, s in self.stages.items()
+                },
+            }
+        if self.limiter is not None:
+            data["limiter"] = self.limiter.snapshot()
+        return data
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        out: list[str] = []
+
+        def metric(name: str, kind: str, help: str) -> None:
+            out.append(f"# HELP geocoder_{name} {help}")
+            out.append(f"# TYPE geocoder_{name} {kind}")
+
+        with self._lock:
+            metric(
+                "search_duration_seconds",
+                "histogram",
+                "Latency of Nominatim searches, including retries.",
+            )
+            for mode, s in self.modes.items():
+                counts = _cumulative(s.buckets)
+                # The last count, over every bound, is the +Inf bucket
+                for bound, count in zip(LATENCY_BUCKETS, counts, strict=False):
+                    out.append(
+                        f'geocoder_search_duration_seconds_bucket{{mode="{mode}",'
+                        f'le="{bound}"}} {count}'
+                    )
+                out.append(
+                    f'geocoder_search_duration_seconds_bucket{{mode="{mode}",'
+                    f'le="+Inf"}} {s.requests}'
+                )
+                out.append(
+                    f'geocoder_search_duration_seconds_sum{{mode="{mode}"}} {s.seconds}'
+                )
+                out.append(
+                    f'geocoder_search_duration_seconds_count{{mode="{mode}"}} '
+                    f"{s.requests}"
+                )
+
+            metric("searches_total", "counter", "Searches by mode and outcome.")
+            for mode, s in self.modes.items():
+                for outcome, count in sorted(s.outcomes.items()):
+                    out.append(
+                        f'geocoder_searches_total{{mode="{mode}",outcome="{outcome}"}} '
+                        f"{count}"
+                    )
+
+            metric("cache_lookups_total", "counter", "Geocode cache lookups.")
+            out.append(
+                f'geocoder_cache_lookups_total{{result="hit"}} {self.cache_hits}'
+            )
+            out.append(
+                f'geocoder_cache_lookups_total{{result="miss"}} {self.cache_misses}'
+            )
+
+            metric("retries_total", "counter", "Requests retried.")
+            out.append(f"geocoder_retries_total {self.retries}")
+
+            metric("stage_rows_total", "counter", "Rows processed by each stage.")
+            for name, st in self.stages.items():
+                out.append(f'geocoder_stage_rows_total{{stage="{name}"}} {st.rows}')
+            metric("stage_seconds_total", "counter", "Time spent in each stage.")
+            for name, st in self.stages.items():
+                out.append(
+                    f'geocoder_stage_seconds_total{{stage="{name}"}} {st.seconds}'
+                )
+
+        if self.limiter is not None:
+            snapshot = self.limiter.snapshot()
+            metric("concurrency_limit", "gauge", "Requests the limiter allows at once.")
+            out.append(f"geocoder_concurrency_limit {snapshot['limit']}")
+            metric("in_flight", "gauge", "Requests in flight.")
+            out.append(f"geocoder_in_flight {snapshot['in_flight']}")
+            if snapshot["latency_ms"] is not None:
+                metric(
+                    "smoothed_latency_seconds",
+                    "gauge",
+                    "Smoothed latency seen by the limiter.",
+                )
+                out.append(
+                    f"geocoder_smoothed_latency_seconds {snapshot['latency_ms'] / 1000}"
+                )
+        return "\n".join(out) + "\n"
+
+
+def _cumulative(buckets: list[int]) -> list[int]:
+    counts, total = [], 0
+    for count in buckets:
+        total += count
+        counts.append(total)
+    return counts
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], metrics: GeocodeMetrics):
+        super().__init__(address, MetricsHandler)
+        self.metrics = metrics
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    server: MetricsServer
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self.send_body(
+                self.server.metrics.to_prometheus().encode(),
+                "text/plain; version=0.0.4",
+                200,
+            )
+        elif self.path == "/metrics.json":
+            self.send_body(
+                json.dumps(self.server.metrics.to_json()).encode(),
+                "application/json",
+                200,
+            )
+        else:
+            self.send_body(b'{"error": "Not Found"}', "application/json", 404)
+
+    def send_body(self, payload: bytes, content_type: str, status: int):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(
+    metrics: GeocodeMetrics, host: str = "127.0.0.1", port: int = DEFAULT_PORT
+) -> MetricsServer:
+    """
+    Serve `metrics` on a daemon thread and return the server; port 0 picks a
+    free port. Call shutdown() and server_close() to stop it.
+    """
+    server = MetricsServer((host, port), metrics)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
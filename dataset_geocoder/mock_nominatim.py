@@ -0,0 +1,326 @@
+"""
+Stand-in for the local Nominatim, for testing and load-testing the geocoder
+without the Docker container from OSRM/run.sh:
+
+    python -m dataset_geocoder.mock_nominatim --port 8080 --latency 20 \\
+        --error-rate 0.02 --throttle-rate 0.01 --max-concurrency 8
+
+Endpoints:
+  GET /search  free-text (q=) or structured (street=, city=, state=,
+               postalcode=) search, answered like Nominatim's format=json
+  GET /status  {"status": 0, "message": "OK", "data_updated": ...}
+  GET /stats   requests served, responses by status, peak concurrency
+
+Results are deterministic. With a fixture, addresses listed in it get their
+recorded coordinates and every other address is not found. Without one,
+every address gets coordinates inside the Worcester viewbox derived from a
+hash of the address, except a `miss_rate` share, also picked by hash, which
+are not found.
+
+Latency, injected 5xx (`error_rate`) and 429 (`throttle_rate`) responses and
+a limit on concurrent searches are configurable; over the limit, searches
+queue, or are answered with 429 if `reject_overload` is set.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from .cache import normalize_query
+from .geocoder import MAX_LAT, MAX_LON, MIN_LAT, MIN_LON, build_address
+
+DEFAULT_PORT = 8080
+
+DATA_VERSION = "2026-01-01T00:00:00+00:00"
+
+STRUCTURED_FIELDS = ("street", "city", "state", "postalcode")
+
+ERROR_STATUSES = (500, 502, 503, 504)
+
+
+def load_fixture(path: str | Path) -> dict[str, dict | None]:
+    """
+    Read search results from a CSV, keyed on the normalized query.
+
+    The CSV either has a `query` column, or the normalized address columns
+    of a geocoder output (the query is then rebuilt with build_address). The
+    `latitude`, `longitude` and `display_name` columns give the result; rows
+    without a latitude are recorded as not found.
+    """
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    fixture: dict[str, dict | None] = {}
+    for row in df.itertuples(index=False):
+        query = row.query if "query" in df.columns else build_address(row)
+        fixture[normalize_query(query)] = (
+            {
+                "lat": row.latitude,
+                "lon": row.longitude,
+                "display_name": row.display_name,
+            }
+            if row.latitude
+            else None
+        )
+    return fixture
+
+
+def _search_text(params: dict[str, str]) -> str:
+    """The free-text form of a search, as geocoder.StructuredQuery.text() builds it."""
+    if "q" in params:
+        return params["q"]
+    return " ".join(params[f] for f in STRUCTURED_FIELDS if params.get(f))
+
+
+class MockNominatim:
+    """Answers searches and keeps counts; safe to call from many threads."""
+
+    def __init__(
+        self,
+        fixture: dict[str, dict | None] | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        miss_rate: float = 0.0,
+        max_concurrency: int | None = None,
+        reject_overload: bool = False,
+        seed: int = 0,
+    ):
+        for name, rate in [
+            ("error_rate", error_rate),
+            ("throttle_rate", throttle_rate),
+            ("miss_rate", miss_rate),
+        ]:
+            if not 0 <= rate <= 1:
+                raise ValueError(f"{name} must be between 0 and 1, got {rate}")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, got {max_concurrency}"
+            )
+
+        self.fixture = fixture
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.miss_rate = miss_rate
+        self.reject_overload = reject_overload
+        self._slots = (
+            threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        )
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.statuses: dict[int, int] = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def search(self, params: dict[str, str]) -> tuple[int, Any]:
+        """Return the HTTP status and JSON body for a /search request."""
+        with self._lock:
+            self.requests += 1
+            roll = self._rng.random()
+            delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+
+        if self._slots is None:
+            status, body = self._answer(params, roll, delay)
+        elif self._slots.acquire(blocking=not self.reject_overload):
+            try:
+                status, body = self._answer(params, roll, delay)
+            finally:
+                self._slots.release()
+        else:
+            status, body = 429, {"error": "Too many concurrent requests"}
+
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        return status, body
+
+    def stats_snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+    def _answer(self, params: dict[str, str], roll: float, delay: float):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(max(0.0, delay))
+            if roll < self.throttle_rate:
+                return 429, {"error": "Too many requests"}
+            if roll < self.throttle_rate + self.error_rate:
+                status = ERROR_STATUSES[int(roll * 1000) % len(ERROR_STATUSES)]
+                return status, {"error": "Injected server error"}
+            result = self._lookup(normalize_query(_search_text(params)))
+            return 200, [result] if result else []
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _lookup(self, query: str) -> dict | None:
+        if not query:
+            return None
+        if self.fixture is not None:
+            return self.fixture.get(query)
+
+        digest = hashlib.blake2b(query.encode(), digest_size=12).digest()
+        if int.from_bytes(digest[:4]) / 2**32 < self.miss_rate:
+            return None
+        lat = MIN_LAT + (MAX_LAT - MIN_LAT) * int.from_bytes(digest[4:8]) / 2**32
+        lon = MIN_LON + (MAX_LON - MIN_LON) * int.from_bytes(digest[8:]) / 2**32
+        return {
+            "lat": f"{lat:.7f}",
+            "lon": f"{lon:.7f}",
+            "display_name": f"{query.title()}, Worcester, Massachusetts, United States",
+        }
+
+
+class MockNominatimServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], mock: MockNominatim):
+        super().__init__(address, MockNominatimHandler)
+        self.mock = mock
+
+
+class MockNominatimHandler(BaseHTTPRequestHandler):
+    server: MockNominatimServer
+    # Keep connections open between requests, like Nominatim's web server
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle's algorithm the
+    # body would wait for the client's delayed ACK of the headers
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/search":
+            status, body = self.server.mock.search(params)
+            self.send_json_response(body, status)
+        elif url.path == "/status":
+            self.send_json_response(
+                {"status": 0, "message": "OK", "data_updated": DATA_VERSION}, 200
+            )
+        elif url.path == "/stats":
+            self.send_json_response(self.server.mock.stats_snapshot(), 200)
+        else:
+            self.send_json_response({"error": "Not Found"}, 404)
+
+    def send_json_response(self, data: Any, status: int):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_in_background(
+    mock: MockNominatim, host: str = "127.0.0.1", port: int = 0
+) -> MockNominatimServer:
+    """
+    Start a server for `mock` on a daemon thread and return it; port 0 picks
+    a free port. Call shutdown() and server_close() to stop it.
+    """
+    server = MockNominatimServer((host, port), mock)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_mock_arguments(parser: argparse._ActionsContainer) -> None:
+    parser.add_argument(
+        "--fixture", help="CSV of search results (default: synthesize results)"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Milliseconds per search"
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="Random +/- milliseconds added to the latency",
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of 5xx responses"
+    )
+    parser.add_argument(
+        "--throttle-rate", type=float, default=0.0, help="Share of 429 responses"
+    )
+    parser.add_argument(
+        "--miss-rate",
+        type=float,
+        default=0.0,
+        help="Share of synthesized addresses that are not found",
+    )
+    parser.add_argument(
+        "--max-concurrency", type=int, help="Searches processed at once (default: any)"
+    )
+    parser.add_argument(
+        "--reject-overload",
+        action="store_true",
+        help="Answer 429 instead of queueing searches over --max-concurrency",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+
+
+def mock_from_args(args: argparse.Namespace) -> MockNominatim:
+    return MockNominatim(
+        fixture=load_fixture(args.fixture) if args.fixture else None,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        miss_rate=args.miss_rate,
+        max_concurrency=args.max_concurrency,
+        reject_overload=args.reject_overload,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a stand-in for the local Nominatim /search endpoint."
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port",
+        "-p",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port to listen on (default: {DEFAULT_PORT})",
+    )
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockNominatimServer((args.host, args.port), mock_from_args(args))
+    print(f"Mock Nominatim listening on http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@ import geopandas as gpd
 import pandas as pd
 from shapely.geometry import Point
 
+from .csv_io import read_frames, write_frames
+from .metrics import GeocodeMetrics
+
 # Path to your MA ZCTA shapefile relative to this script
 SCRIPT_DIR = Path(__file__).parent
 MA_ZCTA_SHP = SCRIPT_DIR / "../data/external/tl_2025_ma_zcta520/tl_2025_ma_zcta520.shp"
@@ -13,32 +16,39 @@ MA_ZCTA_SHP = SCRIPT_DIR / "../data/external/tl_2025_ma_zcta520/tl_2025_ma_zcta5
 print(f"Loading MA ZCTA shapefile from: {MA_ZCTA_SHP.resolve()}")
 zcta_gdf = gpd.read_file(MA_ZCTA_SHP)
 
-# Ensure shapefile is in WGS84
-if not zcta_gdf.crs.is_geographic:
-    zcta_gdf = zcta_gdf.to_crs(epsg=4326)
+# Project to the points' CRS once, not per call: sjoin reuses the spatial
+# index built on this frame, which a reprojected copy would have to rebuild
+zcta_gdf = zcta_gdf.to_crs(epsg=4326)
 print("Shapefile loaded.")
 
 
-def add_zcta_zip(df: pd.DataFrame) -> pd.DataFrame:
+def add_zcta_zip(
+    df: pd.DataFrame, metrics: GeocodeMetrics | None = None
+) -> pd.DataFrame:
     """
     Adds a 'zcta_zip' column to df based on latitude and longitude.
-    Expects df to have 'latitude' and 'longitude' columns.
+    Expects df to have 'latitude' and 'longitude' columns, as numbers or as
+    the text read by csv_io. Timed as the "zcta" stage of `metrics`.
     """
+    if metrics is not None:
+        with metrics.stage("zcta", len(df)):
+            return add_zcta_zip(df)
+
+    # Missing coordinates become NaN points, which fall in no ZCTA
+    longitudes = pd.to_numeric(df["longitude"], errors="coerce")
+    latitudes = pd.to_numeric(df["latitude"], errors="coerce")
+
     # Create points GeoDataFrame
     points = gpd.GeoDataFrame(
         df,
         geometry=[
-            Point(lon, lat)
-            for lon, lat in zip(df["longitude"], df["latitude"], strict=True)
+            Point(lon, lat) for lon, lat in zip(longitudes, latitudes, strict=True)
         ],
         crs="EPSG:4326",
     )
 
-    # Reproject ZCTA shapefile to match points CRS
-    zcta_gdf_proj = zcta_gdf.to_crs(points.crs)
-
     # Spatial join: points inside ZCTAs
-    joined = gpd.sjoin(points, zcta_gdf_proj, how="left", predicate="within")
+    joined = gpd.sjoin(points, zcta_gdf, how="left", predicate="within")
 
     # Use 'ZCTA5CE20' as the ZIP field
     df["zcta_zip"] = joined["ZCTA5CE20"]
@@ -48,20 +58,20 @@ def add_zcta_zip(df: pd.DataFrame) -> pd.DataFrame:
 def zipcode_csv(
     input_file: str,
     output_file: str | None = None,
+    chunk_size: int | None = None,
+    metrics: GeocodeMetrics | None = None,
 ) -> None:
     """
     Reads CSV with 'latitude' and 'longitude' columns and adds 'zcta_zip' column.
+    With `chunk_size`, reads, joins and appends that many rows at a time.
     """
     if output_file is None:
         output_file = input_file
 
-    df = pd.read_csv(
-        input_file,
-        dtype={"street_number": str, "street_range_to": str, "zip_code": str},
+    write_frames(
+        (add_zcta_zip(df, metrics) for df in read_frames(input_file, chunk_size)),
+        output_file,
     )
-
-    df = add_zcta_zip(df)
-    df.to_csv(output_file, index=False)
     print(f"ZIP assignment complete. Output saved to: {output_file}")
 
 
@@ -78,6 +88,9 @@ if __name__ == "__main__":
     parser.add_argument(
         "-o", "--output_file", help="Output CSV file (default overwrites input)"
     )
+    parser.add_argument(
+        "--chunk-size", type=int, help="Rows processed at a time (default: all)"
+    )
     args = parser.parse_args()
 
-    zipcode_csv(args.input_file, args.output_file)
+    zipcode_csv(args.input_file, args.output_file, args.chunk_size)